@@ -0,0 +1,420 @@
+"""HTTP service exposing the summarization pipeline.
+
+Run with:
+    python api.py --host 0.0.0.0 --port 8000
+or under any ASGI server:
+    uvicorn api:app --workers 4
+
+Endpoints (JSON bodies; add "stream": true to the Gemini endpoints to get the
+response as newline-delimited JSON events while it is generated):
+    POST /v1/summarize          {"text", "length"}
+    POST /v1/quiz               {"content", "num_questions"}
+    POST /v1/flashcards         {"content", "num_cards"}
+    POST /v1/study-pack         {"content", "length", "num_questions", "num_cards"}
+    POST /v1/pdf/text           multipart "file" field or a raw application/pdf body
+    POST /v1/youtube/transcript {"url"}
+    GET  /healthz
+    GET  /metrics               Prometheus text format
+
+With "structured": true, quiz and flashcards return schema-validated JSON items
+("questions" / "cards"; streamed as {"item": ...} events) instead of free text.
+
+Every response carries an X-Request-ID header (taken from the request when the
+caller sends one), which is also the ID of the request's trace. The service keeps no session state, so any number of
+instances can run behind a load balancer.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Literal
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from core import pdf_extraction, structured, summarization, tracing, youtube
+from core.errors import GeminiError, PDFExtractionError, PipelineError, YouTubeError
+from core.gemini_client import configure_gemini
+from core.rate_limit import QuotaExceededError
+
+# Requests processed at once by one instance, and how long a request may wait
+# for a free slot before it is turned away with 503
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_QUEUE_TIMEOUT = 10.0
+# Largest accepted PDF upload
+DEFAULT_MAX_PDF_BYTES = 50 * 1024 * 1024
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Status code for each pipeline failure; QuotaExceededError is checked first
+ERROR_STATUS = [
+    (QuotaExceededError, 503),
+    (GeminiError, 502),
+    (PDFExtractionError, 422),
+    (YouTubeError, 422),
+    (PipelineError, 500)
+]
+
+logger = logging.getLogger("summarization_hub.api")
+
+
+# Request bodies
+class SummarizeRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    text: str = Field(min_length=1)
+    length: Literal["short", "medium", "long"] = "medium"
+    stream: bool = False
+
+
+class QuizRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    content: str = Field(min_length=1)
+    num_questions: int = Field(5, ge=1, le=50)
+    structured: bool = False
+    stream: bool = False
+
+
+class FlashcardsRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    content: str = Field(min_length=1)
+    num_cards: int = Field(5, ge=1, le=100)
+    structured: bool = False
+    stream: bool = False
+
+
+class StudyPackRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    content: str = Field(min_length=1)
+    length: Literal["short", "medium", "long"] = "medium"
+    num_questions: int = Field(5, ge=1, le=50)
+    num_cards: int = Field(5, ge=1, le=100)
+
+
+class TranscriptRequest(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    url: str = Field(min_length=1)
+
+
+class ServiceBusy(Exception):
+    """No request slot became free within the queue timeout"""
+
+
+class ConcurrencyLimiter:
+    """Bounds the requests one instance works on, queueing briefly before shedding load"""
+
+    def __init__(self, limit, queue_timeout):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.rejected = 0
+        # Created on first use, inside the server's event loop: before Python
+        # 3.10 a semaphore binds to the loop current when it is constructed
+        self._semaphore = None
+
+    async def acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ServiceBusy() from None
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+
+class LimitedStreamingResponse(StreamingResponse):
+    """Streaming response that gives its concurrency slot back however sending ends"""
+
+    def __init__(self, content, limiter, **kwargs):
+        super().__init__(content, **kwargs)
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        # Also reached when the client disconnects before the body is iterated
+        # or sending fails, which a generator's finally block would not see
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+class RequestIDMiddleware(BaseHTTPMiddleware):
+    """Attach a request ID to every request, response and log line"""
+
+    async def dispatch(self, request, call_next):
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        request.state.request_id = request_id
+        started = time.perf_counter()
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        logger.info(
+            "%s %s %s %d %.3fs", request_id, request.method, request.url.path,
+            response.status_code, time.perf_counter() - started
+        )
+        return response
+
+
+def _error_response(request, status_code, error_type, message, headers=None):
+    body = {
+        "request_id": getattr(request.state, "request_id", None),
+        "error": {"type": error_type, "message": message}
+    }
+    return JSONResponse(body, status_code=status_code, headers=headers)
+
+
+async def _handle_pipeline_error(request, exc):
+    status_code = next(status for error_class, status in ERROR_STATUS if isinstance(exc, error_class))
+    headers = {"Retry-After": "30"} if status_code == 503 else None
+    return _error_response(request, status_code, type(exc).__name__, str(exc), headers)
+
+
+async def _handle_validation_error(request, exc):
+    details = "; ".join(f"{'.'.join(map(str, error['loc'])) or 'body'}: {error['msg']}" for error in exc.errors())
+    return _error_response(request, 422, "ValidationError", details)
+
+
+async def _handle_service_busy(request, exc):
+    return _error_response(
+        request, 503, "ServiceBusy", "The service is at capacity, please retry shortly.", {"Retry-After": "5"}
+    )
+
+
+async def _parse_body(request, model):
+    """Validate the JSON body against a request model"""
+    try:
+        payload = await request.json()
+    except ValueError:
+        # Reported by the model as "Input should be a valid dictionary"
+        payload = None
+    return model.model_validate(payload)
+
+
+async def _run(request, func, *args):
+    """Run a blocking pipeline call in the threadpool under the concurrency limit"""
+    limiter = request.app.state.limiter
+    await limiter.acquire()
+    try:
+        return await run_in_threadpool(tracing.run_traced, request.url.path, request.state.request_id, func, *args)
+    finally:
+        limiter.release()
+
+
+async def _respond(request, result_key, func, *args, stream=False):
+    """Return the result of a Gemini-backed call as JSON, or stream it as NDJSON events"""
+    if not stream:
+        result = await _run(request, func, *args)
+        if not result:
+            raise GeminiError("Gemini did not return a result.")
+        return JSONResponse({"request_id": request.state.request_id, result_key: result})
+
+    return await _stream_events(request, lambda: func(*args, True), lambda chunk: {"delta": chunk})
+
+
+async def _respond_items(request, result_key, stream_func, *args, stream=False):
+    """Return validated structured items as a JSON list, or stream them as NDJSON events"""
+    if not stream:
+        items = await _run(request, lambda: [item.model_dump() for item in stream_func(*args)])
+        if not items:
+            raise GeminiError("Gemini did not return any valid items.")
+        return JSONResponse({"request_id": request.state.request_id, result_key: items})
+
+    return await _stream_events(request, lambda: stream_func(*args), lambda item: {"item": item.model_dump()})
+
+
+async def _stream_events(request, open_stream, encode):
+    """Stream the values of a blocking iterator as NDJSON events under the concurrency limit"""
+    limiter = request.app.state.limiter
+    await limiter.acquire()
+    request_id = request.state.request_id
+
+    async def events():
+        try:
+            values = tracing.traced_stream(request.url.path, open_stream, trace_id=request_id)
+            async for value in iterate_in_threadpool(values):
+                yield json.dumps(encode(value), ensure_ascii=False) + "\n"
+            yield json.dumps({"done": True, "request_id": request_id}) + "\n"
+        except PipelineError as e:
+            # Headers are already sent, so failures are reported in-band
+            yield json.dumps({"error": {"type": type(e).__name__, "message": str(e)}, "request_id": request_id}) + "\n"
+
+    # The slot is held until the response has been sent or abandoned
+    return LimitedStreamingResponse(events(), limiter, media_type="application/x-ndjson")
+
+
+# Endpoints
+async def summarize(request):
+    body = await _parse_body(request, SummarizeRequest)
+    return await _respond(request, "summary", summarization.summarize_text, body.text, body.length, stream=body.stream)
+
+
+async def quiz(request):
+    body = await _parse_body(request, QuizRequest)
+    if body.structured:
+        return await _respond_items(
+            request, "questions", structured.stream_quiz_questions, body.content, body.num_questions, stream=body.stream
+        )
+    return await _respond(request, "quiz", summarization.generate_quiz, body.content, body.num_questions, stream=body.stream)
+
+
+async def flashcards(request):
+    body = await _parse_body(request, FlashcardsRequest)
+    if body.structured:
+        return await _respond_items(
+            request, "cards", structured.stream_flashcards, body.content, body.num_cards, stream=body.stream
+        )
+    return await _respond(request, "flashcards", summarization.generate_flashcards, body.content, body.num_cards, stream=body.stream)
+
+
+async def study_pack(request):
+    body = await _parse_body(request, StudyPackRequest)
+    pack = await _run(
+        request, summarization.generate_study_pack, body.content, body.length, body.num_questions, body.num_cards
+    )
+    return JSONResponse(dict(pack, request_id=request.state.request_id))
+
+
+async def _read_body(request, max_bytes):
+    """Read the raw request body, returning None as soon as it exceeds max_bytes"""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def pdf_text(request):
+    max_bytes = request.app.state.max_pdf_bytes
+    too_large = _error_response(request, 413, "PayloadTooLarge", f"PDFs are limited to {max_bytes} bytes.")
+    # Rejected before anything is read when the client declares the size
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        return too_large
+
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        # Starlette spools uploads over 1 MB to a temporary file, so the size
+        # can be checked before the PDF is loaded into memory
+        form = await request.form(max_files=1)
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            return _error_response(request, 422, "ValidationError", "file: a PDF upload is required")
+        if upload.size is not None and upload.size > max_bytes:
+            return too_large
+        pdf_bytes = await upload.read()
+    else:
+        pdf_bytes = await _read_body(request, max_bytes)
+        if pdf_bytes is None:
+            return too_large
+
+    if not pdf_bytes:
+        return _error_response(request, 422, "ValidationError", "file: a PDF upload is required")
+
+    document = await _run(request, _load_pdf, pdf_bytes)
+    return JSONResponse({
+        "request_id": request.state.request_id,
+        "sha256": document["sha256"],
+        "page_count": document["page_count"],
+        "text": document["text"]
+    })
+
+
+def _load_pdf(pdf_bytes):
+    try:
+        return pdf_extraction.load_pdf_document(pdf_bytes)
+    except Exception as e:
+        raise PDFExtractionError(f"Error extracting text from PDF: {e}") from e
+
+
+async def youtube_transcript(request):
+    body = await _parse_body(request, TranscriptRequest)
+    video_info = await _run(request, youtube.get_youtube_transcript, body.url)
+    return JSONResponse(dict(video_info, request_id=request.state.request_id))
+
+
+async def metrics(request):
+    return PlainTextResponse(tracing.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+async def healthz(request):
+    limiter = request.app.state.limiter
+    return JSONResponse({
+        "status": "ok",
+        "active_requests": limiter.active,
+        "max_concurrency": limiter.limit,
+        "rejected_requests": limiter.rejected
+    })
+
+
+def create_app():
+    """Build the ASGI application, reading configuration from the environment"""
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if api_key:
+        configure_gemini(api_key)
+    else:
+        logger.warning("GOOGLE_API_KEY is not set; Gemini-backed endpoints will fail")
+
+    app = Starlette(
+        routes=[
+            Route("/v1/summarize", summarize, methods=["POST"]),
+            Route("/v1/quiz", quiz, methods=["POST"]),
+            Route("/v1/flashcards", flashcards, methods=["POST"]),
+            Route("/v1/study-pack", study_pack, methods=["POST"]),
+            Route("/v1/pdf/text", pdf_text, methods=["POST"]),
+            Route("/v1/youtube/transcript", youtube_transcript, methods=["POST"]),
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/metrics", metrics, methods=["GET"])
+        ],
+        middleware=[Middleware(RequestIDMiddleware)],
+        exception_handlers={
+            PipelineError: _handle_pipeline_error,
+            ValidationError: _handle_validation_error,
+            ServiceBusy: _handle_service_busy
+        }
+    )
+    app.state.limiter = ConcurrencyLimiter(
+        int(os.getenv("API_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        float(os.getenv("API_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT))
+    )
+    app.state.max_pdf_bytes = int(os.getenv("API_MAX_PDF_BYTES", DEFAULT_MAX_PDF_BYTES))
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the summarization pipeline over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
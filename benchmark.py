@@ -0,0 +1,463 @@
+"""Latency and throughput benchmarks against a local fake Gemini backend.
+
+Examples:
+    python benchmark.py
+    python benchmark.py --iterations 50 --concurrency 8 --latency 0.3 --tokens-per-second 150
+    python benchmark.py --error-rate 0.05 --scenarios summarize-long quiz
+    python benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmark.py --compare benchmarks/baseline.json --tolerance 0.2
+
+The fake backend replaces the Gemini SDK model, so every request still goes
+through the real response cache, request coalescing, rate limiter, retries
+and token accounting. It answers deterministically in the format each prompt
+asks for, after a configurable latency (a fixed time-to-first-token plus
+output tokens at a fixed rate), and can inject retryable 503 errors.
+Each iteration uses freshly generated content so results are not served
+from the caches.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest import mock
+
+from core import gemini_client, pdf_extraction, summarization
+from core.rate_limit import get_retry_stats
+from core.token_budget import estimate_tokens
+
+SCENARIOS = ("summarize", "summarize-long", "quiz", "flashcards", "pdf-extract", "parse-flashcards")
+PERCENTILES = (50, 95, 99)
+# Timings below this many seconds are too small to call a regression
+MIN_REGRESSION_SECONDS = 0.002
+
+WORDS = """
+algorithm analysis approach assumption behaviour boundary calculation capacity cell chapter
+concept condition constraint data definition derivative design distribution energy equation
+estimate evidence example experiment factor function gradient hypothesis interaction layer
+lecture market measure mechanism memory method model network observation parameter pattern
+principle probability process property protein reaction result sample signal solution
+structure system temperature theory transfer value variable velocity weight
+""".split()
+FILLER = ["so", "basically", "you know", "right", "okay", "as I said", "um", "let's see"]
+
+logger = logging.getLogger("summarization_hub.benchmark")
+
+
+# Fake Gemini backend
+class FakeAPIError(Exception):
+    """Injected upstream failure; code 503 makes it retryable like a real overload"""
+
+    def __init__(self, message, code=503):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeBackend:
+    """Shared settings and counters of the fake models"""
+
+    def __init__(self, latency=0.05, tokens_per_second=2000.0, error_rate=0.0, output_tokens=200, seed=0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.output_tokens = output_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.injected_errors = 0
+
+    def model(self, model_name, generation_config=None, **_):
+        return FakeGeminiModel(self, model_name, generation_config)
+
+    def start_call(self):
+        """Count a call and decide whether it fails"""
+        with self._lock:
+            self.calls += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.injected_errors += 1
+        return failed
+
+    def generation_seconds(self, text):
+        return estimate_tokens(text) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+class FakeGeminiModel:
+    """Stand-in for genai.GenerativeModel with the methods the pipeline uses"""
+
+    def __init__(self, backend, model_name, generation_config=None):
+        self.backend = backend
+        self.model_name = model_name
+        self.json_mode = (generation_config or {}).get("response_mime_type") == "application/json"
+
+    def _respond(self, prompt):
+        failed = self.backend.start_call()
+        text = fake_response_text(prompt, self.json_mode, self.backend.output_tokens)
+        return failed, text
+
+    def _result(self, prompt, text):
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt), candidates_token_count=estimate_tokens(text))
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content(self, prompt, stream=False, **_):
+        failed, text = self._respond(prompt)
+        time.sleep(self.backend.latency)
+        if failed:
+            raise FakeAPIError("503 The model is overloaded. Please try again later.")
+        if stream:
+            return self._stream(prompt, text)
+        time.sleep(self.backend.generation_seconds(text))
+        return self._result(prompt, text)
+
+    def _stream(self, prompt, text):
+        pieces = re.findall(r'\S+\s*', text)
+        for start in range(0, len(pieces), 20):
+            chunk = "".join(pieces[start:start + 20])
+            time.sleep(self.backend.generation_seconds(chunk))
+            yield self._result(prompt, chunk)
+
+    async def generate_content_async(self, prompt, **_):
+        failed, text = self._respond(prompt)
+        await asyncio.sleep(self.backend.latency)
+        if failed:
+            raise FakeAPIError("503 The model is overloaded. Please try again later.")
+        await asyncio.sleep(self.backend.generation_seconds(text))
+        return self._result(prompt, text)
+
+    def count_tokens(self, prompt):
+        return SimpleNamespace(total_tokens=estimate_tokens(prompt))
+
+    async def count_tokens_async(self, prompt):
+        return self.count_tokens(prompt)
+
+
+def _requested_count(prompt, default=5):
+    match = re.search(r'create (?:a quiz with )?(\d+)', prompt)
+    return int(match.group(1)) if match else default
+
+
+def fake_response_text(prompt, json_mode=False, output_tokens=200):
+    """Deterministic answer in the format the prompt asks for"""
+    rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+    def sentence(words=12):
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    count = _requested_count(prompt)
+    if json_mode:
+        if "multiple-choice" in prompt:
+            items = [
+                {"question": sentence(), "options": [sentence(4) for _ in range(4)],
+                 "answer": rng.choice("ABCD"), "explanation": sentence()}
+                for _ in range(count)
+            ]
+        else:
+            items = [{"front": sentence(5), "back": sentence()} for _ in range(count)]
+        return json.dumps(items)
+
+    quiz = "\n\n".join(
+        f"Q{number}: {sentence()}\nA: {sentence(4)}\nB: {sentence(4)}\nC: {sentence(4)}\nD: {sentence(4)}\n"
+        f"Correct Answer: {rng.choice('ABCD')}\nExplanation: {sentence()}"
+        for number in range(1, count + 1)
+    )
+    cards = "\n\n".join(f"CARD {number}\nFront: {sentence(5)}\nBack: {sentence()}" for number in range(1, count + 1))
+    summary = " ".join(sentence() for _ in range(max(1, output_tokens // 16)))
+
+    if "=== SUMMARY ===" in prompt:
+        return f"=== SUMMARY ===\n{summary}\n\n=== QUIZ ===\n{quiz}\n\n=== FLASHCARDS ===\n{cards}"
+    if "create a quiz" in prompt:
+        return quiz
+    if "flashcards" in prompt:
+        return cards
+    return summary
+
+
+# Generated inputs
+def make_document(tokens, seed=0):
+    """Lecture-like text of about the given number of tokens"""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < tokens:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+            if rng.random() < 0.3:
+                words.insert(rng.randrange(len(words)), rng.choice(FILLER))
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += estimate_tokens(paragraph)
+    return "\n\n".join(paragraphs)
+
+
+PDF_NONCE = b"%BENCH0000000000\n"
+
+
+def make_pdf(pages, lines_per_page=40, seed=0):
+    """Build a text PDF with the given number of pages, without any PDF library"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_numbers = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(10)) for _ in range(lines_per_page)]
+        text = b" T* ".join(b"(" + line.encode("latin-1") + b") Tj" for line in lines)
+        stream = b"BT /F1 10 Tf 12 TL 50 760 Td " + text + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_numbers.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    output = bytearray(b"%PDF-1.4\n" + PDF_NONCE)
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def _pdf_variant(pdf_bytes, index):
+    """Same document with a different fingerprint, so the extraction cache misses"""
+    nonce = b"%%BENCH%010d\n" % index
+    return pdf_bytes.replace(PDF_NONCE, nonce, 1)
+
+
+# Scenarios: each returns a zero-argument callable for one iteration; the
+# setup work done here is not timed
+def prepare_case(scenario, index, args, shared):
+    if scenario == "summarize":
+        text = make_document(args.short_tokens, seed=index)
+        return lambda: summarization.summarize_text(text, "medium")
+    if scenario == "summarize-long":
+        text = make_document(args.long_tokens, seed=10_000 + index)
+        return lambda: summarization.summarize_text(text, "medium")
+    if scenario == "quiz":
+        text = make_document(args.short_tokens, seed=20_000 + index)
+        return lambda: summarization.generate_quiz(text, 5)
+    if scenario == "flashcards":
+        text = make_document(args.short_tokens, seed=30_000 + index)
+        return lambda: summarization.generate_flashcards(text, 10)
+    if scenario == "pdf-extract":
+        if "pdf" not in shared:
+            shared["pdf"] = make_pdf(args.pages)
+        pdf_bytes = _pdf_variant(shared["pdf"], index)
+        return lambda: pdf_extraction.extract_text_from_pdf(pdf_bytes)
+    if scenario == "parse-flashcards":
+        text = fake_response_text(f"create {args.cards} flashcards #{index}", output_tokens=0)
+        return lambda: summarization.parse_flashcards(text)
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def percentile(sorted_values, q):
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def run_scenario(scenario, args, backend):
+    """Time args.iterations runs of a scenario with args.concurrency at once"""
+    shared = {}
+    # Warm-up runs use indexes past the timed ones so their content differs
+    for index in range(args.warmup):
+        prepare_case(scenario, args.iterations + index, args, shared)()
+
+    cases = [prepare_case(scenario, index, args, shared) for index in range(args.iterations)]
+    calls_before = backend.calls
+    errors_before = backend.injected_errors
+    retries_before = get_retry_stats()["retries"]
+
+    def timed(case):
+        started = time.perf_counter()
+        try:
+            case()
+            return time.perf_counter() - started, None
+        except Exception as e:
+            return time.perf_counter() - started, str(e)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        outcomes = list(executor.map(timed, cases))
+    wall_seconds = time.perf_counter() - started
+
+    latencies = sorted(seconds for seconds, error in outcomes if error is None)
+    failures = [error for _, error in outcomes if error is not None]
+    for error in sorted(set(failures)):
+        logger.warning("%s: %s", scenario, error)
+
+    result = {
+        "iterations": len(outcomes),
+        "failures": len(failures),
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_per_second": round(len(latencies) / wall_seconds, 3) if wall_seconds else None,
+        "mean_seconds": round(sum(latencies) / len(latencies), 5) if latencies else None,
+        "upstream_calls": backend.calls - calls_before,
+        "injected_errors": backend.injected_errors - errors_before,
+        "retries": get_retry_stats()["retries"] - retries_before
+    }
+    for q in PERCENTILES:
+        value = percentile(latencies, q)
+        result[f"p{q}_seconds"] = round(value, 5) if value is not None else None
+    return result
+
+
+# Baselines
+def compare_to_baseline(results, baseline, tolerance):
+    """Return regression messages for percentiles that got slower than the tolerance allows"""
+    regressions = []
+    for scenario, result in results.items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        for q in PERCENTILES:
+            key = f"p{q}_seconds"
+            old, new = previous.get(key), result.get(key)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > MIN_REGRESSION_SECONDS:
+                regressions.append(f"{scenario} {key}: {old * 1000:.1f}ms -> {new * 1000:.1f}ms (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def format_table(results, baseline=None):
+    """Render results as a plain-text table, with baseline p95 deltas if given"""
+    header = f"{'scenario':<18}{'ok/total':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'calls':>8}{'retries':>9}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    lines = [header, "-" * len(header)]
+
+    def ms(value):
+        return f"{value * 1000:.1f}" if value is not None else "-"
+
+    for scenario, result in results.items():
+        line = (
+            f"{scenario:<18}{result['iterations'] - result['failures']:>5}/{result['iterations']:<4}"
+            f"{ms(result['p50_seconds']):>10}{ms(result['p95_seconds']):>10}{ms(result['p99_seconds']):>10}"
+            f"{result['throughput_per_second'] or 0:>10.2f}{result['upstream_calls']:>8}{result['retries']:>9}"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(scenario, {}).get("p95_seconds")
+        if baseline:
+            if previous and result["p95_seconds"] is not None:
+                line += f"{(result['p95_seconds'] / previous - 1) * 100:>+12.0f}%"
+            else:
+                line += f"{'-':>13}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline against a local fake Gemini backend.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--iterations", "-n", type=int, default=20, help="timed runs per scenario")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="runs in flight at once")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per scenario")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake time to first token, in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="fake output rate (0 for instant)")
+    parser.add_argument("--output-tokens", type=int, default=200, help="length of fake summaries")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake calls failing with 503")
+    parser.add_argument("--seed", type=int, default=0, help="seed for error injection")
+    parser.add_argument("--short-tokens", type=int, default=2000, help="size of short documents")
+    parser.add_argument("--long-tokens", type=int, default=40000, help="size of long (chunked) documents")
+    parser.add_argument("--pages", type=int, default=300, help="pages in the generated PDFs")
+    parser.add_argument("--cards", type=int, default=200, help="cards in the flashcard parsing input")
+    parser.add_argument("--output", "-o", help="write the results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a regression (0.2 = 20%%)")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    return parser.parse_args(argv)
+
+
+@contextmanager
+def fake_gemini(backend):
+    """Serve every Gemini model from the fake backend until the block exits"""
+    # Models created before or during the block are not reused outside it
+    with mock.patch.dict(gemini_client._models, clear=True), \
+            mock.patch("google.generativeai.GenerativeModel", backend.model):
+        yield
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    # Fresh caches and no client-side quota unless the environment says otherwise
+    workdir = tempfile.mkdtemp(prefix="summarization-bench-")
+    os.environ.setdefault("GEMINI_CACHE_PATH", os.path.join(workdir, "responses.sqlite3"))
+    os.environ.setdefault("PDF_CACHE_PATH", "")
+    os.environ.setdefault("GEMINI_RPM", "0")
+    os.environ.setdefault("GEMINI_TPM", "0")
+
+    backend = FakeBackend(args.latency, args.tokens_per_second, args.error_rate, args.output_tokens, args.seed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = {}
+    with fake_gemini(backend):
+        for scenario in args.scenarios:
+            print(f"Running {scenario}...", file=sys.stderr)
+            results[scenario] = run_scenario(scenario, args, backend)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {
+            key: getattr(args, key) for key in (
+                "iterations", "concurrency", "latency", "tokens_per_second", "output_tokens",
+                "error_rate", "short_tokens", "long_tokens", "pages", "cards"
+            )
+        },
+        "scenarios": results
+    }
+    print(format_table(results, baseline))
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        if baseline.get("settings") != report["settings"]:
+            print("Note: the baseline was recorded with different settings.", file=sys.stderr)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
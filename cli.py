@@ -0,0 +1,215 @@
+"""Headless batch runner for the summarization pipeline.
+
+Examples:
+    python cli.py summarize lectures/ --length short --output summaries.jsonl
+    python cli.py quiz notes.txt slides.pdf --num 8 --parallelism 4 --output quizzes.jsonl
+    python cli.py flashcards dQw4w9WgXcQ https://youtu.be/abc123xyz00 --output cards.jsonl
+    python cli.py study-pack slides.pdf --length short --num 8 --output packs.jsonl
+
+Each input (text/markdown file, PDF, directory of those, YouTube URL or
+video ID) produces one JSON line in the output file. Re-running with the
+same output file skips inputs that already succeeded, so an interrupted
+nightly run can simply be started again.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from core import pdf_extraction, summarization, tracing, youtube
+from core.gemini_client import configure_gemini
+
+TEXT_EXTENSIONS = {".txt", ".md"}
+PDF_EXTENSIONS = {".pdf"}
+VIDEO_ID_PATTERN = re.compile(r'^[\w-]{11}$')
+
+logger = logging.getLogger("summarization_hub")
+
+
+def collect_inputs(inputs):
+    """Expand paths, directories, YouTube URLs and video IDs into (kind, source) pairs"""
+    collected = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    kind = _file_kind(name)
+                    if kind:
+                        collected.append((kind, os.path.join(root, name)))
+        elif os.path.isfile(item):
+            kind = _file_kind(item)
+            if kind:
+                collected.append((kind, item))
+            else:
+                logger.warning("Skipping unsupported file: %s", item)
+        elif 'youtube.com' in item or 'youtu.be' in item:
+            collected.append(("video", item))
+        elif VIDEO_ID_PATTERN.match(item):
+            collected.append(("video", f"https://www.youtube.com/watch?v={item}"))
+        else:
+            logger.warning("Skipping unknown input: %s", item)
+    return collected
+
+
+def _file_kind(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return "text"
+    if extension in PDF_EXTENSIONS:
+        return "pdf"
+    return None
+
+
+def load_content(kind, source):
+    """Return the text content of one input"""
+    if kind == "text":
+        with open(source, encoding="utf-8") as f:
+            return f.read()
+    if kind == "pdf":
+        return pdf_extraction.extract_text_from_pdf(source)
+    video_info = youtube.get_youtube_transcript(source)
+    # A simulated transcript is invented from the title; recording it as done
+    # would skip the video on every later run, even once captions exist
+    if video_info["simulated"]:
+        raise ValueError("no transcript is available for this video")
+    return video_info["transcript"]
+
+
+def run_task(task, content, options):
+    """Run summarize, quiz, flashcards or study-pack over content"""
+    if task == "study-pack":
+        return summarization.generate_study_pack(content, options["length"], options["num"], options["num"])
+    if task == "summarize":
+        return summarization.summarize_text(content, options["length"])
+    if task == "quiz":
+        return summarization.generate_quiz(content, options["num"])
+    return summarization.generate_flashcards(content, options["num"])
+
+
+def record_key(task, source, options):
+    """Identify one unit of work so completed records can be skipped on resume"""
+    return json.dumps([task, source, options], sort_keys=True)
+
+
+def load_completed(output_path):
+    """Return the keys of records that already succeeded in an existing output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    # A run killed mid-write can also leave half of a multi-byte character
+    with open(output_path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if record.get("status") == "ok":
+                completed.add(record_key(record["task"], record["source"], record["options"]))
+    return completed
+
+
+def ends_with_newline(path):
+    """Return whether a file is missing, empty or ends with a newline"""
+    # Checked in binary mode: the last byte may be part of a truncated character
+    if not os.path.exists(path):
+        return True
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def process(task, kind, source, options):
+    """Load one input and run the task over it, returning the output record"""
+    started = time.perf_counter()
+    record = {"task": task, "source": source, "kind": kind, "options": options}
+    try:
+        with tracing.trace(task, source=source):
+            content = load_content(kind, source)
+            if not content or not content.strip():
+                raise ValueError("no text content could be loaded")
+            result = run_task(task, content, options)
+        if not result:
+            raise RuntimeError("Gemini did not return a result")
+        record.update(status="ok", result=result)
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the summarization pipeline without Streamlit.")
+    parser.add_argument("task", choices=["summarize", "quiz", "flashcards", "study-pack"])
+    parser.add_argument("inputs", nargs="+", help="text/markdown/PDF files, directories, YouTube URLs or video IDs")
+    parser.add_argument("--output", "-o", required=True, help="JSONL file to append results to")
+    parser.add_argument("--length", choices=["short", "medium", "long"], default="medium", help="summary length")
+    parser.add_argument("--num", type=int, default=5, help="number of quiz questions and/or flashcards")
+    parser.add_argument("--parallelism", "-j", type=int, default=4, help="inputs processed at the same time")
+    parser.add_argument("--no-resume", action="store_true", help="redo inputs that already succeeded")
+    parser.add_argument("--verbose", "-v", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        logger.error("Please set GOOGLE_API_KEY in the environment or the .env file")
+        return 2
+
+    configure_gemini(api_key)
+
+    options = {
+        "summarize": {"length": args.length},
+        "study-pack": {"length": args.length, "num": args.num}
+    }.get(args.task, {"num": args.num})
+    completed = set() if args.no_resume else load_completed(args.output)
+    work = [
+        (kind, source) for kind, source in collect_inputs(args.inputs)
+        if record_key(args.task, source, options) not in completed
+    ]
+    logger.info("%d inputs to process (%d already done)", len(work), len(completed))
+    if not work:
+        return 0
+
+    failures = 0
+    # Terminate a line left truncated by an interrupted run before appending
+    needs_newline = not ends_with_newline(args.output)
+    with open(args.output, "a", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=max(1, args.parallelism)) as executor:
+        if needs_newline:
+            output.write("\n")
+
+        futures = [executor.submit(process, args.task, kind, source, options) for kind, source in work]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            # Flush every record so progress survives an interrupted run
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+            if record["status"] != "ok":
+                failures += 1
+                logger.warning("[%d/%d] %s failed: %s", done, len(work), record["source"], record["error"])
+            else:
+                logger.info("[%d/%d] %s done in %.1fs", done, len(work), record["source"], record["seconds"])
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
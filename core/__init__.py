@@ -0,0 +1,10 @@
+"""UI-free summarization pipeline shared by the Streamlit app and the CLI.
+
+Importing this package does not import Streamlit or any of the heavy SDKs
+(google-generativeai, PyPDF2, pytube, youtube-transcript-api); each is
+imported the first time a function that needs it runs. Failures are raised
+as PipelineError subclasses instead of being shown in a UI.
+"""
+from core.errors import GeminiError, PDFExtractionError, PipelineError, YouTubeError
+
+__all__ = ["PipelineError", "GeminiError", "PDFExtractionError", "YouTubeError"]
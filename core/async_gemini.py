@@ -0,0 +1,183 @@
+import asyncio
+import os
+import threading
+import time
+
+from core import tracing
+from core.gemini_client import get_gemini_model
+from core.rate_limit import call_with_retry_async, get_rate_limiter
+from core.response_cache import ResponseCache, get_response_cache
+from core.token_budget import check_prompt_size_async, estimate_tokens, record_usage, usage_from_response
+
+# Upper bound on Gemini requests in flight at once, overridable through the environment
+DEFAULT_MAX_CONCURRENCY = 8
+
+# All async Gemini traffic runs on one background event loop so that the
+# concurrency limit and request coalescing apply across Streamlit sessions
+_loop = None
+_loop_lock = threading.Lock()
+_semaphore = None
+_in_flight = {}
+_active_requests = 0
+_stats = {
+    "upstream_calls": 0,
+    "coalesced_calls": 0,
+    "peak_in_flight": 0
+}
+
+
+def _get_loop():
+    """Return the background event loop, starting it on first use"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="gemini-async", daemon=True)
+            thread.start()
+            _loop = loop
+    return _loop
+
+
+def _get_semaphore():
+    """Return the semaphore bounding requests in flight, creating it on first use"""
+    global _semaphore
+    # Only called from coroutines on the background loop, so it is created
+    # there (before Python 3.10 a semaphore binds to the loop current at
+    # construction) and needs no lock
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+    return _semaphore
+
+
+async def _upstream_call(prompt, model, model_name):
+    """Call Gemini under the concurrency limit and client-side quota, retrying transient errors"""
+    global _active_requests
+    limiter = get_rate_limiter()
+    # Oversized prompts fail here instead of after queueing and a long upstream wait
+    prompt_tokens = await check_prompt_size_async(prompt, model, model_name)
+
+    async def attempt():
+        # Every attempt, including retries, counts against the RPM/TPM quota
+        await limiter.acquire_async(prompt_tokens)
+        return await model.generate_content_async(prompt)
+
+    async with _get_semaphore():
+        _active_requests += 1
+        _stats["upstream_calls"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _active_requests)
+        try:
+            started = time.perf_counter()
+            response = await call_with_retry_async(attempt)
+            input_tokens, output_tokens = usage_from_response(response)
+            record_usage(model_name, estimate_tokens(prompt), input_tokens, output_tokens, time.perf_counter() - started)
+            # Runs in a copy of the caller's context, so this is the caller's model_call span
+            tracing.add_usage(input_tokens, output_tokens)
+            return response.text
+        finally:
+            _active_requests -= 1
+
+
+async def _coalesced_call(key, prompt, model, model_name):
+    """Share one upstream call between identical prompts that are in flight together"""
+    task = _in_flight.get(key)
+    if task is not None:
+        _stats["coalesced_calls"] += 1
+    else:
+        task = asyncio.ensure_future(_upstream_call(prompt, model, model_name))
+        _in_flight[key] = task
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    # Shield the shared task so one caller giving up does not cancel it for the others
+    return await asyncio.shield(task)
+
+
+# The SQLite cache and the first-time model setup block, so they never run on
+# the shared loop: synchronous callers do them in their own thread and async
+# callers in a worker thread
+def _cached_response(key, use_cache):
+    """Return the cached response for key, or None on a miss or with caching off"""
+    cache = get_response_cache() if use_cache else None
+    if cache is None:
+        return None
+    cached = cache.get(key)
+    tracing.record_cache("gemini", cached is not None)
+    return cached
+
+
+def _store_response(key, text, use_cache):
+    cache = get_response_cache() if use_cache else None
+    if cache is not None and text:
+        cache.set(key, text)
+
+
+async def get_gemini_response_async(prompt, model_name="gemini-1.5-pro", generation_config=None, use_cache=True):
+    """Get response from Gemini model asynchronously; raises on API errors"""
+    running_loop = asyncio.get_running_loop()
+    key = ResponseCache.make_key(model_name, prompt, generation_config)
+    cached = await running_loop.run_in_executor(None, tracing.bind(_cached_response), key, use_cache)
+    if cached is not None:
+        return cached
+
+    model = await running_loop.run_in_executor(
+        None, lambda: get_gemini_model(model_name, generation_config=generation_config)
+    )
+    loop = _get_loop()
+    call = _coalesced_call(key, prompt, model, model_name)
+    if running_loop is loop:
+        text = await call
+    else:
+        # Awaited from another event loop: run on the shared loop and bridge the result
+        text = await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(call, loop))
+
+    await running_loop.run_in_executor(None, _store_response, key, text, use_cache)
+    return text
+
+
+def run_gemini_request(prompt, model_name="gemini-1.5-pro", generation_config=None, use_cache=True):
+    """Blocking counterpart of get_gemini_response_async for synchronous callers"""
+    key = ResponseCache.make_key(model_name, prompt, generation_config)
+    cached = _cached_response(key, use_cache)
+    if cached is not None:
+        return cached
+
+    model = get_gemini_model(model_name, generation_config=generation_config)
+    text = asyncio.run_coroutine_threadsafe(_coalesced_call(key, prompt, model, model_name), _get_loop()).result()
+    _store_response(key, text, use_cache)
+    return text
+
+
+def gather_gemini_requests(prompts, model_name="gemini-1.5-pro", generation_config=None, use_cache=True):
+    """Run several prompts concurrently; failed prompts return their exception"""
+    keys = [ResponseCache.make_key(model_name, prompt, generation_config) for prompt in prompts]
+    results = [_cached_response(key, use_cache) for key in keys]
+    misses = [index for index, cached in enumerate(results) if cached is None]
+    if not misses:
+        return results
+
+    try:
+        model = get_gemini_model(model_name, generation_config=generation_config)
+    except Exception as e:
+        # Reported per prompt, like a failed request
+        for index in misses:
+            results[index] = e
+        return results
+
+    async def gather():
+        return await asyncio.gather(
+            *(_coalesced_call(keys[index], prompts[index], model, model_name) for index in misses),
+            return_exceptions=True
+        )
+
+    fetched = asyncio.run_coroutine_threadsafe(gather(), _get_loop()).result()
+    for index, text in zip(misses, fetched):
+        results[index] = text
+        if not isinstance(text, Exception):
+            _store_response(keys[index], text, use_cache)
+    return results
+
+
+def get_async_stats():
+    """Return upstream/coalesced call counters and current in-flight requests"""
+    stats = dict(_stats)
+    stats["in_flight"] = _active_requests
+    return stats
@@ -0,0 +1,190 @@
+"""Local extractive pre-compression of long inputs before they are sent to Gemini.
+
+Sentences are scored with TextRank over TF-IDF vectors (NumPy, CPU only) and
+the highest-ranked ones are kept, in their original order, until the token
+budget is filled. Lecture transcripts and long PDFs repeat themselves a lot,
+so this removes most of the filler at little cost to the summary or quiz.
+"""
+import logging
+import os
+import re
+from collections import Counter
+
+from core.token_budget import estimate_tokens
+
+# Content longer than this many tokens is compressed down to it
+# (PRECOMPRESS_TOKENS; 0, the default, disables pre-compression)
+DEFAULT_PRECOMPRESS_TOKENS = 0
+# Sentences are ranked in segments of at most this many so the similarity
+# matrix stays small; each segment gets a share of the budget matching its size
+SEGMENT_SENTENCES = 800
+# Terms kept in the TF-IDF vocabulary, by document frequency
+MAX_VOCABULARY = 4000
+# Unpunctuated text (e.g. auto-generated captions) is cut into windows of this many words,
+# and text without spaces (e.g. CJK) into windows of this many characters
+MAX_SENTENCE_WORDS = 40
+MAX_SENTENCE_CHARS = 400
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+# Sentences this similar to one already kept are skipped as repetitions
+REDUNDANCY_THRESHOLD = 0.8
+
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just like me
+more most my no nor not now of off on once only or other our ours out over own really right
+same she should so some such than that the their them then there these they this those
+through to too um uh under until up very was we were what when where which while who why
+will with would yeah you your yours okay ok gonna
+""".split())
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+logger = logging.getLogger(__name__)
+
+
+def get_precompress_tokens():
+    """Return the configured pre-compression budget; 0 means disabled"""
+    return int(os.getenv("PRECOMPRESS_TOKENS", DEFAULT_PRECOMPRESS_TOKENS))
+
+
+def split_sentences(text):
+    """Return (paragraph_index, sentence) pairs, windowing overlong unpunctuated runs"""
+    sentences = []
+    for paragraph_index, paragraph in enumerate(re.split(r'\n\s*\n', text)):
+        for sentence in SENTENCE_BOUNDARY.split(paragraph.strip()):
+            words = sentence.split()
+            for start in range(0, len(words), MAX_SENTENCE_WORDS):
+                window = " ".join(words[start:start + MAX_SENTENCE_WORDS])
+                for offset in range(0, len(window), MAX_SENTENCE_CHARS):
+                    sentences.append((paragraph_index, window[offset:offset + MAX_SENTENCE_CHARS]))
+    return sentences
+
+
+def _sentence_terms(sentence):
+    return [word for word in WORD.findall(sentence.lower()) if word not in STOP_WORDS and len(word) > 1]
+
+
+def _vocabulary(terms):
+    """Return {term: column} for the most common terms and their IDF weights"""
+    import numpy as np
+
+    document_frequency = Counter(term for sentence_terms in terms for term in set(sentence_terms))
+    common = document_frequency.most_common(MAX_VOCABULARY)
+    vocabulary = {term: index for index, (term, _) in enumerate(common)}
+    frequencies = np.array([frequency for _, frequency in common], dtype=np.float32)
+    idf = np.log((1 + len(terms)) / (1 + frequencies)) + 1
+    return vocabulary, idf
+
+
+def term_matrix(terms, vocabulary, idf):
+    """Return the L2-normalized TF-IDF matrix (sentences x vocabulary) as float32"""
+    import numpy as np
+
+    rows, columns = [], []
+    for row, sentence_terms in enumerate(terms):
+        for term in sentence_terms:
+            column = vocabulary.get(term)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+
+    matrix = np.zeros((len(terms), max(1, len(vocabulary))), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), 1.0)
+    if len(vocabulary):
+        matrix *= idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def similarity_matrix(vectors):
+    """Return pairwise cosine similarities of normalized rows, with a zero diagonal"""
+    import numpy as np
+
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+    return similarity
+
+
+def textrank_scores(similarity):
+    """Return the TextRank score of each sentence from their similarity matrix"""
+    import numpy as np
+
+    count = len(similarity)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other link to every sentence evenly
+    transition = np.where(out_weight > 0, similarity / np.maximum(out_weight, 1e-12), 1.0 / count)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def _select(sizes, scores, similarity, budget):
+    """Greedily take the best-scoring sentences that fit in the budget and are not repetitions
+
+    The top-scored sentence is always kept, so a segment whose sentences are
+    all larger than its share of the budget is not dropped entirely.
+    """
+    import numpy as np
+
+    ranking = np.argsort(-scores, kind="stable")
+    chosen = [int(ranking[0])]
+    used = sizes[chosen[0]]
+    for index in ranking[1:]:
+        if similarity[index, chosen].max() >= REDUNDANCY_THRESHOLD:
+            continue
+        if used + sizes[index] <= budget:
+            chosen.append(int(index))
+            used += sizes[index]
+    return chosen
+
+
+def compress_text(text, max_tokens=None):
+    """Return text reduced to about max_tokens by keeping its most central sentences
+
+    Text that already fits (or a budget of 0) is returned unchanged. Kept
+    sentences stay in document order and paragraph breaks are preserved.
+    """
+    max_tokens = get_precompress_tokens() if max_tokens is None else max_tokens
+    original_tokens = estimate_tokens(text or "")
+    if not max_tokens or original_tokens <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return text
+    sizes = [estimate_tokens(sentence) for _, sentence in sentences]
+    terms = [_sentence_terms(sentence) for _, sentence in sentences]
+    vocabulary, idf = _vocabulary(terms)
+    total = sum(sizes)
+
+    # Rank each segment separately and give it a proportional share of the
+    # budget, which also keeps every part of the document represented
+    chosen = []
+    for start in range(0, len(sentences), SEGMENT_SENTENCES):
+        end = min(start + SEGMENT_SENTENCES, len(sentences))
+        segment_budget = max_tokens * sum(sizes[start:end]) / total
+        similarity = similarity_matrix(term_matrix(terms[start:end], vocabulary, idf))
+        scores = textrank_scores(similarity)
+        chosen.extend(start + index for index in _select(sizes[start:end], scores, similarity, segment_budget))
+
+    parts = []
+    previous_paragraph = None
+    for index in sorted(chosen):
+        paragraph, sentence = sentences[index]
+        if previous_paragraph is not None:
+            parts.append(" " if paragraph == previous_paragraph else "\n\n")
+        parts.append(sentence)
+        previous_paragraph = paragraph
+
+    compressed = "".join(parts)
+    logger.info("Pre-compressed %d tokens to %d", original_tokens, estimate_tokens(compressed))
+    return compressed
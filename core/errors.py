@@ -0,0 +1,18 @@
+class PipelineError(Exception):
+    """Base class for failures the pipeline reports to its caller
+
+    The message is written for end users, so front ends can show str(error)
+    as is.
+    """
+
+
+class GeminiError(PipelineError):
+    """The Gemini API call failed or returned no usable text"""
+
+
+class PDFExtractionError(PipelineError):
+    """Text could not be extracted from a PDF"""
+
+
+class YouTubeError(PipelineError):
+    """A YouTube URL was invalid or the video could not be processed"""
@@ -0,0 +1,94 @@
+import time
+
+from core import tracing
+from core.async_gemini import gather_gemini_requests, run_gemini_request
+from core.errors import GeminiError
+from core.gemini_client import get_gemini_model
+from core.rate_limit import call_with_retry, get_rate_limiter
+from core.response_cache import get_response_cache
+from core.token_budget import check_prompt_size, estimate_tokens, record_usage, usage_from_response
+
+DEFAULT_MODEL = "gemini-1.5-pro"
+
+
+def _as_gemini_error(error):
+    """Wrap an SDK or transport exception in a GeminiError with a user-facing message"""
+    if isinstance(error, GeminiError):
+        return error
+    return GeminiError(f"Error with Gemini API: {error}")
+
+
+def get_gemini_response(prompt, model_name=DEFAULT_MODEL, generation_config=None, use_cache=True):
+    """Get response from Gemini model, reusing cached answers; raises GeminiError"""
+    with tracing.span("model_call", model=model_name):
+        try:
+            # Goes through the shared async backend so identical in-flight prompts
+            # from different callers are coalesced under one concurrency limit
+            return run_gemini_request(prompt, model_name, generation_config, use_cache)
+        except Exception as e:
+            raise _as_gemini_error(e) from e
+
+
+def get_gemini_responses(prompts, model_name=DEFAULT_MODEL, generation_config=None, use_cache=True):
+    """Get responses for several prompts concurrently; raises the first failure as GeminiError"""
+    with tracing.span("model_call", model=model_name, prompts=len(prompts)):
+        responses = gather_gemini_requests(prompts, model_name, generation_config, use_cache)
+        for result in responses:
+            if isinstance(result, Exception):
+                raise _as_gemini_error(result) from result
+        return responses
+
+
+def stream_gemini_response(prompt, model_name=DEFAULT_MODEL, generation_config=None, use_cache=True):
+    """Yield the Gemini response text chunk by chunk as it is generated; raises GeminiError"""
+    # The span stays open across yields, so it is not made the current one
+    span = tracing.start_span("model_call", model=model_name, stream=True)
+    cache = get_response_cache() if use_cache else None
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(model_name, prompt, generation_config)
+        cached = cache.get(cache_key)
+        tracing.record_cache("gemini", cached is not None, span)
+        if cached is not None:
+            span.end()
+            yield cached
+            return
+
+    parts = []
+    usage = (None, None)
+    try:
+        model = get_gemini_model(model_name, generation_config=generation_config)
+        limiter = get_rate_limiter()
+        prompt_tokens = check_prompt_size(prompt, model, model_name)
+
+        def start_stream():
+            limiter.acquire(prompt_tokens)
+            return model.generate_content(prompt, stream=True)
+
+        started = time.perf_counter()
+        # Transient errors are retried until the first chunk arrives; the SDK
+        # fetches it inside generate_content, so later failures are not retried
+        for chunk in call_with_retry(start_stream):
+            # Each chunk carries the running usage; the last one has the totals
+            usage = usage_from_response(chunk)
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+        record_usage(model_name, estimate_tokens(prompt), *usage, time.perf_counter() - started)
+        span.add(input_tokens=usage[0], output_tokens=usage[1])
+    except Exception as e:
+        span.end(e)
+        raise _as_gemini_error(e) from e
+    finally:
+        span.end()
+
+    # Only complete responses are cached
+    if cache is not None and parts:
+        cache.set(cache_key, "".join(parts))
+
+
+def generate_response(prompt, stream=False):
+    """Get the full response, or a chunk generator when stream is True"""
+    if stream:
+        return stream_gemini_response(prompt)
+    return get_gemini_response(prompt)
@@ -0,0 +1,87 @@
+import json
+import threading
+
+# Process-wide registry of configured models, shared by all Streamlit sessions
+_models = {}
+_registry_lock = threading.Lock()
+_configured_api_key = None
+_pending_api_key = None
+_stats = {
+    "configure_calls": 0,
+    "models_created": 0,
+    "model_reuses": 0
+}
+
+
+def configure_gemini(api_key):
+    """Set the API key used by the Gemini SDK (applied when the first model is created)"""
+    global _pending_api_key
+    with _registry_lock:
+        if api_key == (_pending_api_key or _configured_api_key):
+            return
+        # Importing and configuring the SDK is deferred so that starting the
+        # app or CLI does not pay for google-generativeai until it is used
+        _pending_api_key = None if api_key == _configured_api_key else api_key
+        _models.clear()
+
+
+def _apply_configuration():
+    """Configure the SDK with the pending API key; caller holds the registry lock"""
+    global _configured_api_key, _pending_api_key
+    if _pending_api_key is None:
+        return
+
+    import google.generativeai as genai
+
+    # genai.configure drops the SDK's cached gRPC clients, so calling it on
+    # every Streamlit rerun would force a new connection for the next request
+    genai.configure(api_key=_pending_api_key)
+    _configured_api_key = _pending_api_key
+    _pending_api_key = None
+    _stats["configure_calls"] += 1
+
+
+def get_gemini_model(model_name, generation_config=None, safety_settings=None, system_instruction=None):
+    """Return a shared GenerativeModel for this model name and configuration"""
+    key = (
+        model_name,
+        json.dumps(generation_config or {}, sort_keys=True, default=str),
+        json.dumps(safety_settings or {}, sort_keys=True, default=str),
+        system_instruction or ""
+    )
+
+    with _registry_lock:
+        model = _models.get(key)
+        if model is not None:
+            _stats["model_reuses"] += 1
+            return model
+
+        _apply_configuration()
+
+        import google.generativeai as genai
+
+        # The model creates its API client on first use and keeps it afterwards,
+        # so reusing the instance also reuses the underlying connection
+        model = genai.GenerativeModel(
+            model_name,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+            system_instruction=system_instruction
+        )
+        _models[key] = model
+        _stats["models_created"] += 1
+        return model
+
+
+def get_model_registry_stats():
+    """Return how often shared GenerativeModel instances were created and reused
+
+    The SDK keeps its gRPC client per model instance, so reuses are requests
+    that did not need a new client.
+    """
+    with _registry_lock:
+        stats = dict(_stats)
+        stats["pooled_models"] = len(_models)
+    lookups = stats["models_created"] + stats["model_reuses"]
+    stats["reuse_ratio"] = stats["model_reuses"] / lookups if lookups else 0.0
+    return stats
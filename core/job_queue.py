@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Background jobs run at the same time, overridable through the environment
+DEFAULT_MAX_WORKERS = 2
+# Finished jobs are forgotten after this many seconds
+FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """A unit of background work with status and progress the UI can poll"""
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = QUEUED
+        self.stage = "Waiting in queue"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def update(self, stage, progress):
+        """Record the current stage and a progress fraction between 0 and 1"""
+        self.stage = stage
+        self.progress = progress
+
+
+# Jobs live in the process rather than in session state so they keep running
+# (and stay visible) across Streamlit reruns; sessions only keep the job IDs
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("JOB_QUEUE_WORKERS", DEFAULT_MAX_WORKERS)),
+                thread_name_prefix="job-worker"
+            )
+    return _executor
+
+
+def _run(job, func, args):
+    job.status = RUNNING
+    job.update("Starting", 0.0)
+    # finished_at is set before the final status, so every finished job has one
+    try:
+        job.result = func(job, *args)
+        job.update("Done", 1.0)
+        job.finished_at = time.time()
+        job.status = DONE
+    except Exception as e:
+        job.error = str(e)
+        job.stage = "Failed"
+        job.finished_at = time.time()
+        job.status = FAILED
+
+
+def submit_job(name, func, *args):
+    """Queue func(job, *args) on the background worker pool and return the job"""
+    job = Job(name)
+    with _jobs_lock:
+        _prune_finished_jobs()
+        _jobs[job.id] = job
+    _get_executor().submit(_run, job, func, args)
+    return job
+
+
+def get_jobs(job_ids):
+    """Return the jobs that still exist for the given IDs, in the same order"""
+    with _jobs_lock:
+        return [_jobs[job_id] for job_id in job_ids if job_id in _jobs]
+
+
+def _prune_finished_jobs():
+    cutoff = time.time() - FINISHED_JOB_TTL_SECONDS
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job.finished and job.finished_at is not None and job.finished_at < cutoff
+    ]
+    for job_id in expired:
+        del _jobs[job_id]
@@ -0,0 +1,257 @@
+import hashlib
+import io
+import itertools
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core import tracing
+from core.errors import PDFExtractionError
+from core.response_cache import TieredCache
+
+# Documents with fewer pages than this are extracted in-process
+PARALLEL_PAGE_THRESHOLD = 32
+# Number of consecutive pages handed to a worker process at a time
+PAGES_PER_TASK = 16
+
+# Extraction cache defaults, overridable through environment variables
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_CACHE_PATH = os.path.join(".cache", "pdf_text.sqlite3")
+DEFAULT_DISK_ENTRIES = 1000
+
+# Worker processes are shared by every extraction in the process, so
+# concurrent uploads cannot start more than PDF_EXTRACTION_WORKERS of them
+_pool = None
+_pool_lock = threading.Lock()
+_document_ids = itertools.count()
+
+# Each worker parses a document once and keeps the reader for its later page ranges
+_worker_document_id = None
+_worker_reader = None
+
+
+def _extract_page_range(document_id, path, start, end):
+    global _worker_document_id, _worker_reader
+    if _worker_document_id != document_id:
+        import PyPDF2
+        _worker_reader = PyPDF2.PdfReader(path)
+        _worker_document_id = document_id
+    return [_worker_reader.pages[index].extract_text() or "" for index in range(start, end)]
+
+
+def _get_pool():
+    """Return the process-wide extraction pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the Streamlit server process is multi-threaded
+            _pool = ProcessPoolExecutor(
+                max_workers=_extraction_workers(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+
+def _discard_pool(pool):
+    """Forget a pool whose worker died, so the next extraction starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _extraction_workers():
+    # Read the environment lazily so values loaded from .env are honoured
+    return int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+
+def read_pdf_bytes(pdf_file):
+    """Return the raw bytes of an uploaded file, file object or path"""
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if isinstance(pdf_file, (str, os.PathLike)):
+        with open(pdf_file, "rb") as f:
+            return f.read()
+    if hasattr(pdf_file, "getvalue"):
+        return pdf_file.getvalue()
+    pdf_file.seek(0)
+    return pdf_file.read()
+
+
+def iter_pdf_pages(pdf_file, max_workers=None):
+    """Yield the text of each page in order, extracting page ranges in parallel processes"""
+    import PyPDF2
+
+    pdf_bytes = read_pdf_bytes(pdf_file)
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(reader.pages)
+    # Ranges of this document queued on the shared pool at once
+    workers = max_workers or _extraction_workers()
+
+    # Small documents are not worth the cost of handing pages to worker processes
+    if page_count < PARALLEL_PAGE_THRESHOLD or workers < 2:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    page_ranges = iter([
+        (start, min(start + PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PAGES_PER_TASK)
+    ])
+
+    # Workers read the document from a temporary file instead of every task
+    # carrying a copy of its bytes
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    pending = deque()
+    pool = None
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+
+        pool = _get_pool()
+        document_id = next(_document_ids)
+        for start, end in itertools.islice(page_ranges, workers):
+            pending.append(pool.submit(_extract_page_range, document_id, path, start, end))
+
+        while pending:
+            page_texts = pending.popleft().result()
+            # Keep the workers busy while the caller handles these pages
+            for start, end in itertools.islice(page_ranges, 1):
+                pending.append(pool.submit(_extract_page_range, document_id, path, start, end))
+            yield from page_texts
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        # Also reached when the caller stops early: ranges not started yet are
+        # dropped instead of being extracted for nobody
+        for future in pending:
+            future.cancel()
+        os.remove(path)
+
+
+# Extraction cache: documents are keyed by the SHA-256 of the file, so an
+# entry never goes stale and needs no TTL
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    """Return the two-tier extraction cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    memory_entries=int(os.getenv("PDF_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                    disk_path=os.getenv("PDF_CACHE_PATH", DEFAULT_DISK_CACHE_PATH),
+                    disk_entries=int(os.getenv("PDF_CACHE_DISK_ENTRIES", DEFAULT_DISK_ENTRIES))
+                )
+    return _cache
+
+
+def pdf_fingerprint(pdf_bytes):
+    """Return the content hash used as the extraction cache key"""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _build_document(fingerprint, page_texts):
+    """Bundle extracted page texts with the page metadata kept in the cache"""
+    page_offsets = []
+    offset = 0
+    for page_text in page_texts:
+        page_offsets.append(offset)
+        offset += len(page_text)
+    return {
+        "sha256": fingerprint,
+        "page_count": len(page_texts),
+        "page_offsets": page_offsets,
+        "text": "".join(page_texts)
+    }
+
+
+def document_pages(document):
+    """Return the per-page texts of a cached document"""
+    text = document["text"]
+    bounds = document["page_offsets"] + [len(text)]
+    return [text[bounds[i]:bounds[i + 1]] for i in range(document["page_count"])]
+
+
+def get_cached_document(fingerprint):
+    """Look a document up in memory, then on disk; None if it was never extracted"""
+    return _get_cache().get(fingerprint)
+
+
+def store_document(document):
+    """Save an extracted document in both cache tiers"""
+    _get_cache().set(document["sha256"], document)
+
+
+def load_pdf_document(pdf_file, max_workers=None):
+    """Return the text and page metadata of a PDF, parsing each distinct file only once"""
+    with tracing.span("extraction") as span:
+        pdf_bytes = read_pdf_bytes(pdf_file)
+        fingerprint = pdf_fingerprint(pdf_bytes)
+        document = get_cached_document(fingerprint)
+        tracing.record_cache("pdf", document is not None)
+        if document is None:
+            document = _build_document(fingerprint, list(iter_pdf_pages(pdf_bytes, max_workers)))
+            store_document(document)
+        span.set(pages=document["page_count"], bytes=len(pdf_bytes))
+        return document
+
+
+def iter_pdf_document_pages(pdf_file, max_workers=None):
+    """Like iter_pdf_pages, but served from the extraction cache when possible"""
+    # The span stays open across yields, so it is not made the current one
+    span = tracing.start_span("extraction", streamed=True)
+    try:
+        pdf_bytes = read_pdf_bytes(pdf_file)
+        fingerprint = pdf_fingerprint(pdf_bytes)
+        document = get_cached_document(fingerprint)
+        tracing.record_cache("pdf", document is not None, span)
+        if document is not None:
+            span.set(pages=document["page_count"])
+            yield from document_pages(document)
+            return
+
+        page_texts = []
+        for page_text in iter_pdf_pages(pdf_bytes, max_workers):
+            page_texts.append(page_text)
+            yield page_text
+
+        # Only a fully consumed document is cached
+        store_document(_build_document(fingerprint, page_texts))
+        span.set(pages=len(page_texts))
+    except Exception as e:
+        span.end(e)
+        raise
+    finally:
+        span.end()
+
+
+def extract_text_from_pdf(pdf_file):
+    """Return the text of a PDF, raising PDFExtractionError if it cannot be read"""
+    try:
+        return load_pdf_document(pdf_file)["text"]
+    except Exception as e:
+        raise PDFExtractionError(f"Error extracting text from PDF: {e}") from e
+
+
+def iter_text_from_pdf(pdf_file):
+    """Yield the text of a PDF page by page, raising PDFExtractionError on failure"""
+    try:
+        yield from iter_pdf_document_pages(pdf_file)
+    except Exception as e:
+        raise PDFExtractionError(f"Error extracting text from PDF: {e}") from e
+
+
+def get_pdf_cache_stats():
+    """Return hit/miss counters for both tiers of the extraction cache, or None before its first use"""
+    # Reading the statistics must not create the cache (and its SQLite file)
+    return _cache.stats() if _cache is not None else None
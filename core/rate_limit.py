@@ -0,0 +1,220 @@
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+
+from core.errors import GeminiError
+
+# Retry and quota defaults, overridable through environment variables
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+# Requests/tokens per minute; set either to 0 to disable that limit
+DEFAULT_RPM = 1000
+DEFAULT_TPM = 4000000
+# Requests that would have to queue longer than this are rejected instead
+DEFAULT_MAX_QUEUE_SECONDS = 30.0
+
+# HTTP status codes worth retrying: rate limited, server errors, timeouts
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_stats_lock = threading.Lock()
+_stats = {
+    "retries": 0,
+    "throttled_waits": 0,
+    "throttled_seconds": 0.0,
+    "shed_requests": 0,
+    "final_failures": 0
+}
+
+
+class QuotaExceededError(GeminiError):
+    """Raised when a request would wait too long for client-side quota"""
+
+
+def _record(name, amount=1):
+    """Increment one of the retry/quota counters"""
+    with _stats_lock:
+        _stats[name] += amount
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Take amount tokens, returning how long the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+            self.updated_at = now
+
+            # The balance may go negative: later callers queue behind this one
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate_per_second
+
+    def refund(self, amount=1):
+        """Give back tokens from a reservation that will not be used"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """Client-side RPM/TPM limiter that queues requests or sheds them when the wait is too long"""
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_queue_seconds=DEFAULT_MAX_QUEUE_SECONDS):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_queue_seconds = max_queue_seconds
+
+    def reserve(self, token_count):
+        """Reserve quota for one request and return the wait in seconds"""
+        waits = []
+        if self.requests is not None:
+            waits.append(self.requests.reserve(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.reserve(token_count))
+        wait = max(waits, default=0.0)
+
+        if self.max_queue_seconds and wait > self.max_queue_seconds:
+            if self.requests is not None:
+                self.requests.refund(1)
+            if self.tokens is not None:
+                self.tokens.refund(token_count)
+            _record("shed_requests")
+            raise QuotaExceededError(
+                f"Gemini quota exhausted; request would wait {wait:.0f}s. Please try again shortly."
+            )
+
+        if wait > 0:
+            _record("throttled_waits")
+            _record("throttled_seconds", wait)
+        return wait
+
+    def acquire(self, token_count):
+        """Block until quota is available for one request"""
+        wait = self.reserve(token_count)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, token_count):
+        """Wait asynchronously until quota is available for one request"""
+        wait = self.reserve(token_count)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def is_retryable(error):
+    """Return True for transient errors such as 429, 503 and timeouts"""
+    if isinstance(error, QuotaExceededError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+def retry_after_seconds(error):
+    """Extract a server-provided retry delay from an API error, if there is one"""
+    # google.rpc.RetryInfo attached to the error details
+    for detail in getattr(error, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    # Retry-After header on HTTP transports
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after") or headers.get("Retry-After")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+
+    # Gemini also spells the hint out in the message, e.g. "Please retry in 17.5s"
+    match = re.search(r"retry in ([\d.]+)\s*s", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def backoff_delay(error, attempt):
+    """Delay before retry number attempt: the server hint, else exponential backoff with full jitter"""
+    max_delay = float(os.getenv("GEMINI_RETRY_MAX_DELAY", DEFAULT_MAX_DELAY))
+    hint = retry_after_seconds(error)
+    if hint is not None:
+        return min(hint, max_delay)
+    base_delay = float(os.getenv("GEMINI_RETRY_BASE_DELAY", DEFAULT_BASE_DELAY))
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def _max_retries():
+    return int(os.getenv("GEMINI_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+
+
+def call_with_retry(func):
+    """Call func, retrying transient failures with backoff"""
+    max_retries = _max_retries()
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                _record("final_failures")
+                raise
+            delay = backoff_delay(e, attempt)
+            attempt += 1
+            _record("retries")
+            time.sleep(delay)
+
+
+async def call_with_retry_async(func):
+    """Await func(), retrying transient failures with backoff"""
+    max_retries = _max_retries()
+    attempt = 0
+    while True:
+        try:
+            return await func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                _record("final_failures")
+                raise
+            delay = backoff_delay(e, attempt)
+            attempt += 1
+            _record("retries")
+            await asyncio.sleep(delay)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter, creating it on first use"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    rpm=int(os.getenv("GEMINI_RPM", DEFAULT_RPM)),
+                    tpm=int(os.getenv("GEMINI_TPM", DEFAULT_TPM)),
+                    max_queue_seconds=float(os.getenv("GEMINI_MAX_QUEUE_SECONDS", DEFAULT_MAX_QUEUE_SECONDS))
+                )
+    return _limiter
+
+
+def get_retry_stats():
+    """Return retry, throttling and failure counters"""
+    with _stats_lock:
+        return dict(_stats)
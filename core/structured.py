@@ -0,0 +1,219 @@
+"""Schema-validated quiz questions and flashcards generated in Gemini's JSON mode.
+
+Items are parsed from the streamed response as soon as each JSON object is
+complete and validated with pydantic. Items that fail validation (or are
+missing) are re-requested on their own instead of regenerating the whole set.
+"""
+import json
+import logging
+from typing import List, Literal
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from core import tracing
+from core.compression import compress_text
+from core.gemini import get_gemini_response, stream_gemini_response
+from core.summarization import fit_to_budget
+
+# Asks Gemini to answer with raw JSON instead of Markdown-wrapped text
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+# Rounds of re-requests for items that were invalid or missing
+MAX_REPAIR_ATTEMPTS = 2
+
+logger = logging.getLogger(__name__)
+
+
+class Question(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    question: str = Field(min_length=1)
+    options: List[str] = Field(min_length=4, max_length=4)
+    answer: Literal["A", "B", "C", "D"]
+    explanation: str = Field(min_length=1)
+
+
+class Flashcard(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    front: str = Field(min_length=1)
+    back: str = Field(min_length=1)
+
+
+ITEM_SCHEMAS = {
+    Question: """{"question": "question text", "options": ["option A", "option B", "option C", "option D"], "answer": "A" | "B" | "C" | "D", "explanation": "why the answer is correct"}""",
+    Flashcard: """{"front": "question or term", "back": "answer or definition"}"""
+}
+ITEM_NAMES = {Question: "multiple-choice quiz questions", Flashcard: "study flashcards"}
+
+
+class JSONArrayParser:
+    """Incrementally extracts the objects of a streamed top-level JSON array
+
+    Each feed() scans only the new characters and returns the objects that
+    were completed by them, so items can be shown while the response is
+    still being generated. Anything before the opening bracket (such as a
+    Markdown code fence) is ignored, and an array wrapped in an object, as
+    in {"questions": [...]}, is read the same way.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = 0
+        self._depth = 0
+        # Depth of the first array opened; its items are one level below it
+        self._array_depth = None
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Add text and return the list of objects completed by it"""
+        self._buffer += chunk
+        items = []
+        buffer = self._buffer
+
+        for index in range(self._position, len(buffer)):
+            char = buffer[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif char == "{" and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = index
+            elif char in "]}":
+                self._depth -= 1
+                if char == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    items.append(self._decode(buffer[self._item_start:index + 1]))
+                    self._item_start = None
+
+        # Drop text that belongs to items already returned
+        keep_from = self._item_start if self._item_start is not None else len(buffer)
+        self._buffer = buffer[keep_from:]
+        if self._item_start is not None:
+            self._item_start = 0
+        self._position = len(self._buffer)
+        return items
+
+    @staticmethod
+    def _decode(text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            # Kept so the caller can count it as an invalid item
+            return text
+
+
+def build_items_prompt(model, content, count, exclude=()):
+    """Build the JSON-mode prompt for count items of the given model"""
+    content = fit_to_budget(content)
+    avoid = ""
+    if exclude:
+        listed = "\n".join(f"    - {item}" for item in exclude)
+        avoid = f"\n    Do not repeat any of these existing items:\n{listed}\n"
+
+    return f"""
+    Based on the following content, create {count} {ITEM_NAMES[model]}.
+    Respond with a JSON array of exactly {count} objects, each of this form:
+    {ITEM_SCHEMAS[model]}
+    {avoid}
+    CONTENT:
+    {content}
+    """
+
+
+def validate_item(model, raw):
+    """Return a validated model instance, or None if raw does not match the schema"""
+    try:
+        return model.model_validate(raw)
+    except ValidationError as e:
+        logger.debug("Invalid %s item: %s", model.__name__, e)
+        return None
+
+
+def _item_label(item):
+    return item.question if isinstance(item, Question) else item.front
+
+
+def stream_items(model, content, count):
+    """Yield validated items as they are parsed from the stream, then any re-requested ones
+
+    Raises GeminiError if the initial request fails. Fewer than count items
+    are yielded only if re-requests still do not produce valid ones.
+    """
+    parser = JSONArrayParser()
+    accepted = []
+    with tracing.span("prompt_build"):
+        content = compress_text(content)
+        prompt = build_items_prompt(model, content, count)
+
+    for chunk in stream_gemini_response(prompt, generation_config=JSON_GENERATION_CONFIG):
+        for raw in parser.feed(chunk):
+            item = validate_item(model, raw)
+            if item is not None and len(accepted) < count:
+                accepted.append(item)
+                yield item
+
+    # Ask again only for the items that were invalid or missing
+    for attempt in range(MAX_REPAIR_ATTEMPTS):
+        missing = count - len(accepted)
+        if missing <= 0:
+            return
+        logger.info("Re-requesting %d of %d %s items (attempt %d)", missing, count, model.__name__, attempt + 1)
+        prompt = build_items_prompt(model, content, missing, [_item_label(item) for item in accepted])
+        # use_cache=False: an identical repair prompt would return the same invalid answer
+        response = get_gemini_response(prompt, generation_config=JSON_GENERATION_CONFIG, use_cache=False)
+        for raw in JSONArrayParser().feed(response or ""):
+            item = validate_item(model, raw)
+            if item is not None and len(accepted) < count:
+                accepted.append(item)
+                yield item
+
+
+def generate_items(model, content, count):
+    """Return a list of validated items; raises GeminiError"""
+    return list(stream_items(model, content, count))
+
+
+# Quiz questions
+def stream_quiz_questions(content, num_questions=5):
+    """Yield validated Question objects as they are generated"""
+    return stream_items(Question, content, num_questions)
+
+
+def generate_quiz_questions(content, num_questions=5):
+    """Return a list of validated Question objects"""
+    return generate_items(Question, content, num_questions)
+
+
+def format_question(number, question):
+    """Render a Question in the plain-text quiz format used by generate_quiz"""
+    options = "\n".join(f"{letter}: {option}" for letter, option in zip("ABCD", question.options))
+    return (
+        f"Q{number}: {question.question}\n{options}\n"
+        f"Correct Answer: {question.answer}\nExplanation: {question.explanation}"
+    )
+
+
+# Flashcards
+def stream_flashcards(content, num_cards=5):
+    """Yield validated Flashcard objects as they are generated"""
+    return stream_items(Flashcard, content, num_cards)
+
+
+def generate_flashcard_items(content, num_cards=5):
+    """Return a list of validated Flashcard objects"""
+    return generate_items(Flashcard, content, num_cards)
+
+
+def format_flashcard(number, card):
+    """Render a Flashcard in the plain-text CARD/Front/Back format used by generate_flashcards"""
+    return f"CARD {number}\nFront: {card.front}\nBack: {card.back}"
@@ -0,0 +1,605 @@
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from core import tracing
+from core.compression import compress_text, get_precompress_tokens
+from core.errors import GeminiError, PDFExtractionError, PipelineError
+from core.gemini import generate_response, get_gemini_response, get_gemini_responses, stream_gemini_response
+from core.pdf_extraction import iter_text_from_pdf
+from core.summary_cache import get_summary_cache
+from core.token_budget import estimate_tokens, get_max_prompt_tokens
+
+# Long inputs are split into chunks of at most this many (estimated) tokens
+CHUNK_TOKEN_BUDGET = 8000
+# How many times partial summaries may be merged before forcing a final pass
+MAX_REDUCE_DEPTH = 3
+# Instructions for each summary length
+SUMMARY_LENGTH_GUIDE = {
+    "short": "Create a very concise summary in 2-3 sentences.",
+    "medium": "Create a comprehensive summary in about 5-7 sentences.",
+    "long": "Create a detailed summary covering all key points."
+}
+EMPTY_TEXT_MESSAGE = "Please provide some text to summarize."
+# Tokens kept free for the instructions around the content in a prompt
+PROMPT_OVERHEAD_TOKENS = 1000
+# Chunks of a document arriving page by page that are summarized at once
+STREAMED_CHUNK_WORKERS = 4
+# Marks the gaps between the excerpts fit_to_budget keeps
+SAMPLE_SEPARATOR = "\n\n[...]\n\n"
+# Sentence ends, including CJK full-width punctuation which is not followed by a space
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+# Incremental mode cuts text into blocks of roughly this many tokens; a block
+# ends after a paragraph whose hash is divisible by BLOCK_BOUNDARY_DIVISOR once
+# it holds BLOCK_MIN_TOKENS, so an edit only moves the boundaries around it
+BLOCK_MIN_TOKENS = 400
+BLOCK_MAX_TOKENS = 1500
+BLOCK_BOUNDARY_DIVISOR = 4
+
+
+# Text summarization
+def summarize_text(text, length="medium", stream=False):
+    """Summarize text using Gemini (stream=True returns a chunk generator); raises GeminiError"""
+    if not text:
+        return iter([EMPTY_TEXT_MESSAGE]) if stream else EMPTY_TEXT_MESSAGE
+
+    # Near-duplicates of an already summarized input reuse its summary
+    cache = get_summary_cache()
+    signature = None
+    with tracing.span("prompt_build"):
+        if cache is not None:
+            signature = cache.signature(text)
+        if signature is not None:
+            cached = cache.get(signature, length)
+            tracing.record_cache("summary", cached is not None)
+            if cached is not None:
+                return iter([cached]) if stream else cached
+        text = compress_text(text)
+
+    if stream:
+        chunks = _stream_summary(text, length)
+        return _remember_stream(chunks, cache, signature, length) if signature is not None else chunks
+
+    summary = _summarize(text, length)
+    if signature is not None and summary:
+        cache.set(signature, length, summary)
+    return summary
+
+
+def _summarize(text, length):
+    """Summarize (already compressed) text in one prompt or chunk by chunk"""
+    # Short inputs fit in a single prompt
+    if estimate_tokens(text) <= CHUNK_TOKEN_BUDGET:
+        return generate_response(build_summary_prompt(text, length))
+
+    # Long inputs are summarized chunk by chunk, then merged
+    return reduce_summaries(summarize_chunks(text), length)
+
+
+def _stream_summary(text, length):
+    """Generator behind summarize_text(stream=True); only the final pass is streamed"""
+    if estimate_tokens(text) <= CHUNK_TOKEN_BUDGET:
+        yield from stream_gemini_response(build_summary_prompt(text, length))
+        return
+
+    yield from reduce_summaries(summarize_chunks(text), length, stream=True)
+
+
+def _remember_stream(chunks, cache, signature, length):
+    """Pass a summary stream through and cache the summary once it is complete"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    if parts:
+        cache.set(signature, length, "".join(parts))
+
+
+def summarize_chunks(text):
+    """Summarize each chunk of a long text concurrently"""
+    with tracing.span("prompt_build") as span:
+        chunks = split_text_into_chunks(text)
+        prompts = [build_chunk_summary_prompt(chunk) for chunk in chunks]
+        span.set(chunks=len(chunks))
+    return get_gemini_responses(prompts)
+
+
+def summarize_pages(pages, length="medium"):
+    """Summarize text arriving page by page, starting on full chunks before the last page arrives
+
+    Returns None if the pages hold no text; raises GeminiError.
+    """
+    if get_precompress_tokens():
+        # Pre-compression ranks sentences across the whole document
+        text = "".join(pages)
+        return summarize_text(text, length) if text.strip() else None
+
+    pending = ""
+    futures = []
+    with ThreadPoolExecutor(max_workers=STREAMED_CHUNK_WORKERS) as executor:
+        try:
+            for page_text in pages:
+                pending += page_text
+                if estimate_tokens(pending) > CHUNK_TOKEN_BUDGET:
+                    # Every chunk but the last is complete; the last one keeps filling
+                    *complete, pending = split_text_into_chunks(pending)
+                    for chunk in complete:
+                        futures.append(executor.submit(tracing.bind(_summarize_chunk), chunk))
+
+            # Short documents take the usual single-prompt path
+            if not futures:
+                return summarize_text(pending, length) if pending.strip() else None
+
+            for chunk in split_text_into_chunks(pending):
+                futures.append(executor.submit(tracing.bind(_summarize_chunk), chunk))
+            summaries = [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return reduce_summaries(summaries, length)
+
+
+def _summarize_chunk(chunk):
+    return get_gemini_response(build_chunk_summary_prompt(chunk))
+
+
+def build_summary_prompt(text, length="medium"):
+    """Build the prompt that produces the final summary"""
+    return f"""
+    Please summarize the following text. {SUMMARY_LENGTH_GUIDE.get(length, SUMMARY_LENGTH_GUIDE["medium"])}
+
+    TEXT TO SUMMARIZE:
+    {text}
+    """
+
+
+def build_chunk_summary_prompt(chunk):
+    """Build the prompt used to summarize one chunk of a longer document"""
+    return f"""
+    The following text is one section of a longer document.
+    Summarize this section, keeping every key point, name, number and conclusion
+    so the summary can later be merged with the summaries of the other sections.
+
+    SECTION:
+    {chunk}
+    """
+
+
+def build_merge_prompt(summaries_text):
+    """Build the prompt used to merge consecutive section summaries"""
+    return f"""
+    The following are summaries of consecutive sections of a longer document.
+    Merge them into a single summary of these sections, keeping every key point,
+    name, number and conclusion.
+
+    SECTION SUMMARIES:
+    {summaries_text}
+    """
+
+
+def reduce_summaries(summaries, length="medium", depth=0, stream=False):
+    """Merge partial summaries into the final summary, recursively if needed"""
+    combined = "\n\n".join(summaries)
+
+    if estimate_tokens(combined) <= CHUNK_TOKEN_BUDGET or depth >= MAX_REDUCE_DEPTH:
+        return generate_response(build_summary_prompt(combined, length), stream)
+
+    # Still too long for one prompt: merge groups of summaries and try again
+    groups = split_text_into_chunks(combined)
+    merged = get_gemini_responses([build_merge_prompt(group) for group in groups])
+    return reduce_summaries(merged, length, depth + 1, stream)
+
+
+# Incremental summarization
+def summarize_incrementally(text, length="medium", block_summaries=None, stream=False):
+    """Summarize text from per-block summaries, only summarizing blocks not in block_summaries.
+
+    block_summaries maps block hashes to summaries from earlier calls; it is
+    updated in place to hold exactly the blocks of this text. Raises GeminiError.
+    """
+    if not text:
+        return iter([EMPTY_TEXT_MESSAGE]) if stream else EMPTY_TEXT_MESSAGE
+    if block_summaries is None:
+        block_summaries = {}
+
+    with tracing.span("prompt_build") as span:
+        blocks = split_text_into_blocks(text)
+        keys = [_block_key(block) for block in blocks]
+        missing = {key: block for key, block in zip(keys, blocks) if key not in block_summaries}
+        span.set(blocks=len(blocks), changed_blocks=len(missing))
+        for key in keys:
+            tracing.record_cache("summary_block", key not in missing)
+
+    # Text that fits in one block gains nothing from a separate merge pass
+    if len(blocks) == 1:
+        block_summaries.clear()
+        return generate_response(build_summary_prompt(text, length), stream)
+
+    if missing:
+        prompts = [build_chunk_summary_prompt(block) for block in missing.values()]
+        block_summaries.update(zip(missing, get_gemini_responses(prompts)))
+    for key in set(block_summaries) - set(keys):
+        del block_summaries[key]
+
+    return reduce_summaries([block_summaries[key] for key in keys], length, stream=stream)
+
+
+def split_text_into_blocks(text):
+    """Split text into paragraph-aligned blocks whose boundaries depend only on nearby content"""
+    blocks = []
+    current = []
+    current_tokens = 0
+
+    for piece in _split_into_pieces(text, BLOCK_MAX_TOKENS):
+        # Sized like _block_key hashes, so respacing the text keeps its boundaries
+        piece_tokens = estimate_tokens(" ".join(piece.split()))
+        if current and current_tokens + piece_tokens > BLOCK_MAX_TOKENS:
+            blocks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+
+        if current_tokens >= BLOCK_MIN_TOKENS and int(_block_key(piece)[:8], 16) % BLOCK_BOUNDARY_DIVISOR == 0:
+            blocks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+
+    if current:
+        blocks.append("\n\n".join(current))
+
+    return blocks
+
+
+def _block_key(block):
+    """Hash a block ignoring whitespace differences"""
+    return hashlib.sha256(" ".join(block.split()).encode("utf-8")).hexdigest()
+
+
+# Chunking helpers
+def split_text_into_chunks(text, max_tokens=CHUNK_TOKEN_BUDGET):
+    """Split text into chunks under a token budget on paragraph/sentence boundaries"""
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for piece in _split_into_pieces(text, max_tokens):
+        piece_tokens = estimate_tokens(piece)
+        # Start a new chunk when this piece would overflow the current one
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(piece)
+        current_tokens += piece_tokens
+
+    if current:
+        chunks.append("\n\n".join(current))
+
+    return chunks
+
+
+def _split_into_pieces(text, max_tokens):
+    """Yield paragraphs, falling back to sentences and then raw slices for oversized ones"""
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            yield paragraph
+            continue
+
+        sentence_group = ""
+        group_tokens = 0
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            # A single sentence longer than a chunk is cut into slices that fit
+            if estimate_tokens(sentence) > max_tokens:
+                if sentence_group:
+                    yield sentence_group
+                    sentence_group = ""
+                    group_tokens = 0
+                yield from _slice_to_budget(sentence, max_tokens)
+                continue
+
+            sentence_tokens = estimate_tokens(sentence)
+            if sentence_group and group_tokens + sentence_tokens > max_tokens:
+                yield sentence_group
+                sentence_group = sentence
+                group_tokens = sentence_tokens
+            else:
+                sentence_group = f"{sentence_group} {sentence}" if sentence_group else sentence
+                group_tokens += sentence_tokens
+
+        if sentence_group:
+            yield sentence_group
+
+
+def _slice_to_budget(text, max_tokens):
+    """Cut text into consecutive slices each estimated at no more than max_tokens"""
+    while text:
+        # Start from the text's own characters-per-token ratio, then shrink to fit
+        size = max(1, len(text) * max_tokens // estimate_tokens(text))
+        while size > 1 and estimate_tokens(text[:size]) > max_tokens:
+            size = size * 9 // 10
+        yield text[:size]
+        text = text[size:]
+
+
+# Prompt budgeting
+def content_token_budget():
+    """Return how many content tokens a single quiz/flashcard prompt may carry"""
+    return max(CHUNK_TOKEN_BUDGET, get_max_prompt_tokens() - PROMPT_OVERHEAD_TOKENS)
+
+
+def plan_request(content, task="summary"):
+    """Describe how content will be sent before any call is made
+
+    Returns the estimated token count after pre-compression (PRECOMPRESS_TOKENS)
+    and the strategy: "single" (one prompt), "chunk" (summaries of long
+    content are built from chunk summaries) or "truncate" (quiz/flashcard
+    content over the budget is sampled down to it).
+    """
+    tokens = estimate_tokens(content)
+    # Pre-compression runs first, so later stages only see its output
+    precompress_tokens = get_precompress_tokens()
+    plan = {"original_tokens": tokens, "precompressed": bool(precompress_tokens) and tokens > precompress_tokens}
+    if plan["precompressed"]:
+        tokens = precompress_tokens
+
+    if task == "summary":
+        if tokens <= CHUNK_TOKEN_BUDGET:
+            plan.update(tokens=tokens, strategy="single", chunks=1, budget=CHUNK_TOKEN_BUDGET)
+        else:
+            plan.update(tokens=tokens, strategy="chunk", chunks=-(-tokens // CHUNK_TOKEN_BUDGET), budget=CHUNK_TOKEN_BUDGET)
+        return plan
+
+    budget = content_token_budget()
+    plan.update(tokens=tokens, strategy="single" if tokens <= budget else "truncate", chunks=1, budget=budget)
+    return plan
+
+
+def fit_to_budget(content, max_tokens=None):
+    """Return content unchanged if it fits, else evenly spaced chunks of it that do
+
+    Sampling across the whole document, rather than cutting off its end,
+    keeps later sections represented in quizzes and flashcards.
+    """
+    max_tokens = max_tokens or content_token_budget()
+    if estimate_tokens(content) <= max_tokens:
+        return content
+
+    chunk_tokens = max(1, min(CHUNK_TOKEN_BUDGET, max_tokens // 4))
+    chunks = split_text_into_chunks(content, chunk_tokens)
+    sizes = [estimate_tokens(chunk) + estimate_tokens(SAMPLE_SEPARATOR) for chunk in chunks]
+    # Chunks vary in size, so start from the average and sample fewer until they fit
+    keep = min(len(chunks), max(1, max_tokens * len(chunks) // sum(sizes)))
+    while True:
+        step = len(chunks) / keep
+        indexes = [int(index * step) for index in range(keep)]
+        if keep == 1 or sum(sizes[index] for index in indexes) <= max_tokens:
+            break
+        keep -= 1
+    return SAMPLE_SEPARATOR.join(chunks[index] for index in indexes)
+
+
+# Background jobs
+def summarize_pdf_job(job, pdf_bytes, length="medium"):
+    """Job body: extract one PDF and summarize it, raising on failure"""
+    with tracing.trace("summarize_pdf_job", trace_id=job.id):
+        return _summarize_pdf_job(job, pdf_bytes, length)
+
+
+def _summarize_pdf_job(job, pdf_bytes, length):
+    def pages():
+        # Chunk summaries start while later pages are still being extracted
+        for number, page_text in enumerate(iter_text_from_pdf(pdf_bytes), 1):
+            job.update(f"Extracting and summarizing page {number}", 0.1)
+            yield page_text
+        job.update("Summarizing", 0.8)
+
+    job.update("Extracting text", 0.1)
+    summary = summarize_pages(pages(), length)
+    if summary is None:
+        raise PDFExtractionError("No text could be extracted from the PDF.")
+    if not summary:
+        raise GeminiError("Gemini did not return a summary.")
+    return summary
+
+
+# Quiz generation
+QUIZ_FORMAT = """For each question, provide:
+    1. The question
+    2. Four possible answers (A, B, C, D)
+    3. The correct answer
+    4. A brief explanation of why it's correct
+
+    Format each question as follows:
+
+    Q1: [Question text]
+    A: [Option A]
+    B: [Option B]
+    C: [Option C]
+    D: [Option D]
+    Correct Answer: [Letter]
+    Explanation: [Brief explanation]"""
+
+
+def build_quiz_prompt(content, num_questions=5):
+    """Build the prompt that produces a multiple-choice quiz"""
+    content = fit_to_budget(content)
+    return f"""
+    Based on the following content, create a quiz with {num_questions} questions.
+    {QUIZ_FORMAT}
+
+    CONTENT:
+    {content}
+    """
+
+
+def generate_quiz(content, num_questions=5, stream=False):
+    """Generate quiz questions from content (stream=True returns a chunk generator)"""
+    with tracing.span("prompt_build"):
+        prompt = build_quiz_prompt(compress_text(content), num_questions)
+    return generate_response(prompt, stream)
+
+
+# Flashcard generation
+FLASHCARD_FORMAT = """For each flashcard, provide:
+    1. A front side with a question or term
+    2. A back side with the answer or definition
+
+    Format each flashcard as follows:
+
+    CARD 1
+    Front: [Question or term]
+    Back: [Answer or definition]"""
+
+
+def build_flashcard_prompt(content, num_cards=5):
+    """Build the prompt that produces front/back flashcards"""
+    content = fit_to_budget(content)
+    return f"""
+    Based on the following content, create {num_cards} flashcards for studying.
+    {FLASHCARD_FORMAT}
+
+    CONTENT:
+    {content}
+    """
+
+
+def generate_flashcards(content, num_cards=5, stream=False):
+    """Generate flashcards from content (stream=True returns a chunk generator)"""
+    with tracing.span("prompt_build"):
+        prompt = build_flashcard_prompt(compress_text(content), num_cards)
+    return generate_response(prompt, stream)
+
+
+def parse_flashcards(flashcards_text):
+    """Parse CARD/Front/Back text into a list of {"front", "back"} dicts"""
+    with tracing.span("parsing", format="flashcards") as span:
+        cards = _parse_flashcard_lines(flashcards_text)
+        span.set(items=len(cards))
+    return cards
+
+
+def _parse_flashcard_lines(flashcards_text):
+    cards = []
+    current_card = {}
+
+    for line in flashcards_text.split('\n'):
+        line = line.strip()
+        if line.startswith("CARD"):
+            if 'front' in current_card and 'back' in current_card:
+                cards.append(current_card)
+            current_card = {}
+        elif line.startswith("Front:"):
+            current_card['front'] = line[6:].strip()
+        elif line.startswith("Back:"):
+            current_card['back'] = line[5:].strip()
+
+    # Add the last card if it exists
+    if 'front' in current_card and 'back' in current_card:
+        cards.append(current_card)
+
+    return cards
+
+
+# Study packs
+STUDY_PACK_SECTIONS = ("SUMMARY", "QUIZ", "FLASHCARDS")
+STUDY_PACK_HEADING = re.compile(r'^\s*=== (SUMMARY|QUIZ|FLASHCARDS) ===\s*$', re.M)
+
+
+def build_study_pack_prompt(content, length="medium", num_questions=5, num_cards=5):
+    """Build one prompt that asks for the summary, quiz and flashcards together"""
+    return f"""
+    Based on the following content, create three study materials. Start each one
+    with its heading line exactly as shown below, and write nothing before the first heading.
+
+    === SUMMARY ===
+    Summarize the content. {SUMMARY_LENGTH_GUIDE.get(length, SUMMARY_LENGTH_GUIDE["medium"])}
+
+    === QUIZ ===
+    A quiz with {num_questions} questions.
+    {QUIZ_FORMAT}
+
+    === FLASHCARDS ===
+    {num_cards} flashcards for studying.
+    {FLASHCARD_FORMAT}
+
+    CONTENT:
+    {content}
+    """
+
+
+def split_study_pack(response_text):
+    """Split a combined response into its sections; missing or empty sections are left out"""
+    with tracing.span("parsing", format="study_pack"):
+        parts = STUDY_PACK_HEADING.split(response_text or "")
+        sections = {}
+        # parts alternates [preamble, heading, body, heading, body, ...]
+        for heading, body in zip(parts[1::2], parts[2::2]):
+            if body.strip():
+                sections[heading] = body.strip()
+        return sections
+
+
+def generate_study_pack(content, length="medium", num_questions=5, num_cards=5):
+    """Generate a summary, quiz and flashcards from one piece of content; raises GeminiError
+
+    Content that fits in one chunk is sent once, in a single prompt asking for
+    all three parts, instead of three times. Longer content is also sent only
+    once: its chunk summaries feed the final summary as usual, and the quiz and
+    flashcards are built from them too. Any part missing from a combined
+    response is requested on its own; a part still empty after that is an
+    error, so callers always get all three.
+    """
+    if not content:
+        raise PipelineError(EMPTY_TEXT_MESSAGE)
+
+    with tracing.span("prompt_build"):
+        content = compress_text(content)
+
+    if estimate_tokens(content) <= CHUNK_TOKEN_BUDGET:
+        sections = _generate_combined_study_pack(content, length, num_questions, num_cards)
+    else:
+        chunk_summaries = summarize_chunks(content)
+        notes = "\n\n".join(chunk_summaries)
+        if estimate_tokens(notes) <= CHUNK_TOKEN_BUDGET:
+            sections = _generate_combined_study_pack(notes, length, num_questions, num_cards)
+        else:
+            # The summaries still need merging: the quiz and flashcards are
+            # generated from them while the merge passes run
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                summary = executor.submit(tracing.bind(reduce_summaries), chunk_summaries, length)
+                quiz, flashcards = get_gemini_responses([
+                    build_quiz_prompt(notes, num_questions),
+                    build_flashcard_prompt(notes, num_cards)
+                ])
+                sections = {"SUMMARY": summary.result(), "QUIZ": quiz, "FLASHCARDS": flashcards}
+
+    missing = [section.lower() for section in STUDY_PACK_SECTIONS if not sections.get(section)]
+    if missing:
+        raise GeminiError(f"Gemini did not return the study pack's {' and '.join(missing)}.")
+
+    return {
+        "summary": sections["SUMMARY"],
+        "quiz": sections["QUIZ"],
+        "flashcards": sections["FLASHCARDS"]
+    }
+
+
+def _generate_combined_study_pack(content, length, num_questions, num_cards):
+    """Request all three parts in one prompt, then any missing part on its own"""
+    sections = split_study_pack(generate_response(build_study_pack_prompt(content, length, num_questions, num_cards)))
+    missing = [section for section in STUDY_PACK_SECTIONS if section not in sections]
+    if missing:
+        with tracing.span("prompt_build"):
+            prompts = {
+                "SUMMARY": build_summary_prompt(content, length),
+                "QUIZ": build_quiz_prompt(content, num_questions),
+                "FLASHCARDS": build_flashcard_prompt(content, num_cards)
+            }
+        sections.update(zip(missing, get_gemini_responses([prompts[section] for section in missing])))
+    return sections
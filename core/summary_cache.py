@@ -0,0 +1,166 @@
+"""Near-duplicate cache for summaries.
+
+The Gemini response cache only matches identical prompts, so the same article
+pasted with different whitespace, a fixed typo or an extra closing paragraph
+is summarized from scratch. Here each input is fingerprinted with a MinHash
+signature over overlapping word shingles (NumPy, no network), and a new input
+whose estimated Jaccard similarity to a cached one reaches the threshold
+reuses that input's summary, provided the summary length matches. Candidates
+are found through LSH banding, so a lookup does not scan every entry.
+"""
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+# Inputs at least this similar (estimated Jaccard similarity of their shingle
+# sets) share a summary (SUMMARY_DEDUP_THRESHOLD; 0 disables the cache)
+DEFAULT_THRESHOLD = 0.9
+# Summaries kept in memory before the least recently used ones are evicted
+DEFAULT_MAX_ENTRIES = 1000
+# Words per shingle
+SHINGLE_WORDS = 5
+# Inputs with fewer shingles than this are left to the exact response cache,
+# since a single changed word already moves them past any useful threshold
+MIN_SHINGLES = 20
+NUM_PERMUTATIONS = 128
+# LSH bands x rows must equal NUM_PERMUTATIONS; with 4 rows per band, inputs
+# above 0.9 similarity share a band with near certainty
+LSH_BANDS = 32
+# Smallest prime above 2**32, the range of the CRC32 shingle hashes
+HASH_PRIME = 4294967311
+# Shingle hashes are permuted in batches of this many to bound memory use
+HASH_BATCH = 4096
+
+WORD = re.compile(r"[^\W_]+")
+
+
+def shingle_hashes(text):
+    """Return the distinct 32-bit hashes of the text's word shingles"""
+    words = WORD.findall(text.lower())
+    count = max(len(words) - SHINGLE_WORDS + 1, 0)
+    return {
+        zlib.crc32(" ".join(words[start:start + SHINGLE_WORDS]).encode("utf-8"))
+        for start in range(count)
+    }
+
+
+class SummaryCache:
+    """In-memory MinHash/LSH index mapping near-duplicate inputs to their summaries"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_entries=DEFAULT_MAX_ENTRIES, seed=1):
+        import numpy as np
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Keeping a < 2**32 means a * hash fits in an unsigned 64-bit integer
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, 2 ** 32, NUM_PERMUTATIONS, dtype=np.uint64)
+        self._b = generator.integers(0, HASH_PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def signature(self, text):
+        """Return the MinHash signature of text, or None if it is too short to fingerprint"""
+        import numpy as np
+
+        hashes = shingle_hashes(text)
+        if len(hashes) < MIN_SHINGLES:
+            return None
+
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+        signature = np.full(NUM_PERMUTATIONS, HASH_PRIME, dtype=np.uint64)
+        for start in range(0, len(values), HASH_BATCH):
+            batch = values[start:start + HASH_BATCH, None]
+            permuted = (self._a * batch % HASH_PRIME + self._b) % HASH_PRIME
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature, length):
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        return [
+            (length, band, signature[band * rows:(band + 1) * rows].tobytes())
+            for band in range(LSH_BANDS)
+        ]
+
+    def get(self, signature, length):
+        """Return the summary of the most similar cached input, or None on a miss"""
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(signature, length):
+                candidates.update(self._buckets.get(key, ()))
+
+            best_id, best_similarity = None, self.threshold
+            for entry_id in candidates:
+                similarity = float((self._entries[entry_id][0] == signature).mean())
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def set(self, signature, length, summary):
+        """Store a summary, evicting the least recently used entries over the limit"""
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            keys = self._band_keys(signature, length)
+            self._entries[entry_id] = (signature, keys, summary)
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                evicted_id, (_, evicted_keys, _) = self._entries.popitem(last=False)
+                for key in evicted_keys:
+                    bucket = self._buckets[key]
+                    bucket.discard(evicted_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def clear(self):
+        """Remove every cached summary"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current number of entries"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries)
+        }
+
+
+_cache = None
+_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Return the process-wide summary cache, or None when it is disabled"""
+    global _cache, _configured
+    if not _configured:
+        with _cache_lock:
+            if not _configured:
+                # Read the environment lazily so values loaded from .env are honoured
+                threshold = float(os.getenv("SUMMARY_DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+                if threshold > 0:
+                    _cache = SummaryCache(
+                        threshold=threshold,
+                        max_entries=int(os.getenv("SUMMARY_DEDUP_ENTRIES", DEFAULT_MAX_ENTRIES))
+                    )
+                _configured = True
+    return _cache
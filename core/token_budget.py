@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import deque
+
+from core.errors import GeminiError
+
+# Hard input limits of the models we use; prompts estimated above these are
+# rejected before any network call
+MODEL_INPUT_TOKEN_LIMITS = {
+    "gemini-1.5-pro": 2097152,
+    "gemini-1.5-flash": 1048576
+}
+DEFAULT_INPUT_TOKEN_LIMIT = 1048576
+# Content sent in a single quiz/flashcard prompt is kept under this many
+# tokens (overridable through GEMINI_MAX_PROMPT_TOKENS) to bound cost and latency
+DEFAULT_MAX_PROMPT_TOKENS = 128000
+# Estimates within this fraction of a limit are confirmed with an exact count
+# when GEMINI_EXACT_TOKEN_COUNT is enabled
+EXACT_COUNT_MARGIN = 0.1
+# Per-request usage records kept in memory
+USAGE_HISTORY = 500
+
+_usage_lock = threading.Lock()
+_usage = deque(maxlen=USAGE_HISTORY)
+_totals = {
+    "requests": 0,
+    "estimated_input_tokens": 0,
+    "input_tokens": 0,
+    "output_tokens": 0,
+    "exact_counts": 0,
+    "rejected_prompts": 0
+}
+
+
+class PromptTooLargeError(GeminiError):
+    """The prompt is larger than the model accepts, so sending it would fail"""
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in a piece of text"""
+    # Gemini tokenizes English prose at roughly four characters per token,
+    # while non-Latin scripts (e.g. CJK) use about one token per character.
+    # The UTF-8 byte overhead approximates how much of the text is non-ASCII
+    # without a Python-level pass over it
+    extra_bytes = len(text.encode("utf-8", "ignore")) - len(text)
+    return len(text) // 4 + extra_bytes // 2 + 1
+
+
+def get_input_token_limit(model_name):
+    """Return the maximum prompt size of a model"""
+    return MODEL_INPUT_TOKEN_LIMITS.get(model_name, DEFAULT_INPUT_TOKEN_LIMIT)
+
+
+def get_max_prompt_tokens():
+    """Return the configured budget for content sent in a single prompt"""
+    return int(os.getenv("GEMINI_MAX_PROMPT_TOKENS", DEFAULT_MAX_PROMPT_TOKENS))
+
+
+def exact_counting_enabled():
+    return os.getenv("GEMINI_EXACT_TOKEN_COUNT", "").lower() in ("1", "true", "yes")
+
+
+def _needs_exact_count(estimate, limit):
+    return exact_counting_enabled() and estimate >= limit * (1 - EXACT_COUNT_MARGIN)
+
+
+def _check(prompt_tokens, limit, model_name):
+    if prompt_tokens > limit:
+        with _usage_lock:
+            _totals["rejected_prompts"] += 1
+        raise PromptTooLargeError(
+            f"The request is about {prompt_tokens:,} tokens, over the {limit:,}-token limit of {model_name}. "
+            "Please use a shorter document."
+        )
+    return prompt_tokens
+
+
+def check_prompt_size(prompt, model, model_name):
+    """Return the prompt's token count, raising PromptTooLargeError if it cannot fit
+
+    The local estimate is used unless it is close to the limit and exact
+    counting is enabled, in which case the model's count_tokens is asked.
+    """
+    estimate = estimate_tokens(prompt)
+    limit = get_input_token_limit(model_name)
+    if _needs_exact_count(estimate, limit):
+        estimate = model.count_tokens(prompt).total_tokens
+        with _usage_lock:
+            _totals["exact_counts"] += 1
+    return _check(estimate, limit, model_name)
+
+
+async def check_prompt_size_async(prompt, model, model_name):
+    """Async version of check_prompt_size"""
+    estimate = estimate_tokens(prompt)
+    limit = get_input_token_limit(model_name)
+    if _needs_exact_count(estimate, limit):
+        estimate = (await model.count_tokens_async(prompt)).total_tokens
+        with _usage_lock:
+            _totals["exact_counts"] += 1
+    return _check(estimate, limit, model_name)
+
+
+def usage_from_response(response):
+    """Return (input_tokens, output_tokens) reported by a Gemini response, or (None, None)"""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is None:
+        return None, None
+    return (
+        getattr(metadata, "prompt_token_count", None),
+        getattr(metadata, "candidates_token_count", None)
+    )
+
+
+def record_usage(model_name, estimated_input_tokens, input_tokens, output_tokens, seconds):
+    """Record the token counts of one upstream Gemini request"""
+    record = {
+        "time": time.time(),
+        "model": model_name,
+        "estimated_input_tokens": estimated_input_tokens,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "seconds": round(seconds, 3)
+    }
+    with _usage_lock:
+        _usage.append(record)
+        _totals["requests"] += 1
+        _totals["estimated_input_tokens"] += estimated_input_tokens
+        _totals["input_tokens"] += input_tokens or 0
+        _totals["output_tokens"] += output_tokens or 0
+
+
+def get_token_stats(recent=20):
+    """Return token totals, the estimator's accuracy and the most recent requests"""
+    with _usage_lock:
+        stats = dict(_totals)
+        stats["recent"] = list(_usage)[-recent:] if recent else []
+        measured = [record for record in _usage if record["input_tokens"]]
+    if measured:
+        # Below 1.0 the estimator over-counts, above 1.0 it under-counts
+        stats["actual_to_estimate_ratio"] = (
+            sum(record["input_tokens"] for record in measured)
+            / sum(record["estimated_input_tokens"] for record in measured)
+        )
+    return stats
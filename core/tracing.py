@@ -0,0 +1,404 @@
+"""Per-request tracing and Prometheus-style metrics for the pipeline stages.
+
+A trace covers one user-facing operation (a summary, a quiz, a PDF upload)
+and holds a span for each stage it went through: extraction, YouTube
+fetches, prompt building, model calls and parsing. Spans carry an ID, their
+parent's ID, their duration and attributes such as token counts and cache
+hits. Finished traces are kept in memory for inspection and, when TRACE_LOG
+is set, written as one JSON line each ("-" for stderr, otherwise a file path).
+
+Stage and request durations also feed histograms that render_metrics()
+returns in the Prometheus text format, together with the counters the other
+core modules already keep (retries, cache hits, tokens).
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Finished traces kept in memory
+RECENT_TRACES = 200
+METRIC_PREFIX = "summarization"
+
+METRIC_HELP = {
+    "requests_total": ("counter", "Traced operations by feature and outcome"),
+    "request_duration_seconds": ("histogram", "End-to-end duration of traced operations"),
+    "stage_duration_seconds": ("histogram", "Duration of each pipeline stage"),
+    "cache_lookups_total": ("counter", "Cache lookups by cache and result"),
+    "gemini_tokens_total": ("counter", "Gemini tokens reported by the API"),
+    "gemini_upstream_calls_total": ("counter", "Requests sent to Gemini"),
+    "gemini_coalesced_calls_total": ("counter", "Requests served by an identical in-flight request"),
+    "gemini_in_flight": ("gauge", "Gemini requests currently in flight"),
+    "gemini_retries_total": ("counter", "Retries of transient Gemini errors"),
+    "gemini_final_failures_total": ("counter", "Gemini requests that failed after all retries"),
+    "gemini_throttled_seconds_total": ("counter", "Time spent waiting for client-side quota"),
+    "gemini_shed_requests_total": ("counter", "Requests rejected because quota was exhausted"),
+    "gemini_rejected_prompts_total": ("counter", "Prompts rejected for exceeding the model's input limit"),
+    "gemini_models_created_total": ("counter", "GenerativeModel instances (each with its own API client) created"),
+    "gemini_model_reuses_total": ("counter", "Requests served by an already created GenerativeModel instance"),
+    "cache_entries": ("gauge", "Entries currently held by each cache tier")
+}
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_metrics_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_recent = deque(maxlen=RECENT_TRACES)
+_log_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+def new_id():
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed stage of a trace"""
+
+    def __init__(self, name, parent=None, trace_id=None, feature=None, attributes=None, is_trace=False):
+        self.name = name
+        self.is_trace = is_trace
+        self.span_id = new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = trace_id or (parent.trace_id if parent else self.span_id)
+        self.feature = feature or (parent.feature if parent else None)
+        self.root = parent.root if parent else self
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self.seconds = None
+        self.error = None
+        self.children = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        if parent is not None:
+            with parent.root._lock:
+                parent.root.children.append(self)
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def add(self, **amounts):
+        """Increment numeric attributes, e.g. token counts from several calls"""
+        with self._lock:
+            for name, amount in amounts.items():
+                if amount is not None:
+                    self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def fail(self, error):
+        self.error = error if isinstance(error, str) else type(error).__name__
+
+    def end(self, error=None):
+        if self.seconds is not None:
+            return
+        if error is not None:
+            self.fail(error)
+        self.seconds = time.perf_counter() - self._started
+        if not self.is_trace:
+            observe("stage_duration_seconds", self.seconds, feature=self.feature or "none", stage=self.name)
+
+    def to_dict(self):
+        with self._lock:
+            attributes = dict(self.attributes)
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": round(self.started_at, 6),
+            "seconds": round(self.seconds, 6) if self.seconds is not None else None,
+            "error": self.error,
+            "attributes": attributes
+        }
+
+
+# Spans
+def current_span():
+    return _current_span.get()
+
+
+def start_span(name, **attributes):
+    """Start a span under the current one without making it current
+
+    For work that spans yields of a generator: the caller must call end().
+    """
+    return Span(name, parent=_current_span.get(), attributes=attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a stage of the current trace; the span is current inside the block"""
+    current = Span(name, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.fail(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def add_usage(input_tokens=None, output_tokens=None):
+    """Add a Gemini call's token counts to the current span"""
+    current = _current_span.get()
+    if current is not None:
+        current.add(input_tokens=input_tokens, output_tokens=output_tokens)
+
+
+def record_cache(cache, hit, target=None):
+    """Count a cache lookup and flag it on the given (or current) span"""
+    increment("cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+    target = target or _current_span.get()
+    if target is not None:
+        target.set(cache_hit=hit)
+        target.add(**{"cache_hits" if hit else "cache_misses": 1})
+
+
+def bind(func):
+    """Return func bound to a copy of the current context, for running in another thread"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+
+    return run
+
+
+# Traces
+def _begin_trace(feature, trace_id=None, attributes=None):
+    parent = _current_span.get()
+    if parent is not None:
+        # Nested operations (e.g. a study pack's summary) become spans of the outer trace
+        root = Span(feature, parent=parent, attributes=attributes)
+    else:
+        root = Span(feature, trace_id=trace_id, feature=feature, attributes=attributes, is_trace=True)
+    return root, _current_span.set(root)
+
+
+def _finish_trace(root, error=None):
+    root.end(error)
+    if not root.is_trace:
+        return
+
+    status = "error" if root.error else "ok"
+    increment("requests_total", feature=root.feature, status=status)
+    observe("request_duration_seconds", root.seconds, feature=root.feature)
+
+    with root._lock:
+        children = list(root.children)
+    record = {
+        "trace_id": root.trace_id,
+        "feature": root.feature,
+        "status": status,
+        "error": root.error,
+        "started_at": round(root.started_at, 6),
+        "seconds": round(root.seconds, 6),
+        "attributes": root.to_dict()["attributes"],
+        "spans": [child.to_dict() for child in children]
+    }
+    with _metrics_lock:
+        _recent.append(record)
+    _write_log(record)
+
+
+@contextmanager
+def trace(feature, trace_id=None, **attributes):
+    """Trace one operation; stages inside the block are recorded as its spans"""
+    root, token = _begin_trace(feature, trace_id, attributes)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish_trace(root, error)
+
+
+def traced_stream(feature, func, *args, trace_id=None, **kwargs):
+    """Trace a generator-producing call over the whole time it is being consumed
+
+    Each step runs in a context of its own with the trace current, so the
+    trace does not leak into the consumer between chunks, and the stream may
+    be consumed from different threads.
+    """
+    context = contextvars.copy_context()
+    root, _ = context.run(_begin_trace, feature, trace_id)
+    iterator = None
+    error = None
+    try:
+        iterator = context.run(lambda: iter(func(*args, **kwargs)))
+        while True:
+            try:
+                value = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield value
+    except GeneratorExit:
+        # The consumer stopped early: close the inner stream so its spans end too
+        root.set(cancelled=True)
+        if hasattr(iterator, "close"):
+            context.run(iterator.close)
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _finish_trace(root, error)
+
+
+def run_traced(feature, trace_id, func, *args, **kwargs):
+    """Call func inside a trace (for callers that cannot use a with block, e.g. thread pools)"""
+    with trace(feature, trace_id):
+        return func(*args, **kwargs)
+
+
+def _write_log(record):
+    destination = os.getenv("TRACE_LOG", "")
+    logger.debug("trace %s", record["trace_id"], extra={"trace": record})
+    if not destination:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _log_lock:
+        if destination == "-":
+            sys.stderr.write(line)
+        else:
+            with open(destination, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def get_recent_traces(limit=50):
+    """Return the most recently finished traces, newest first"""
+    with _metrics_lock:
+        traces = list(_recent)
+    return traces[::-1][:limit]
+
+
+def get_slowest_traces(limit=10):
+    """Return the slowest of the recently finished traces"""
+    with _metrics_lock:
+        traces = list(_recent)
+    return sorted(traces, key=lambda record: record["seconds"], reverse=True)[:limit]
+
+
+# Metrics
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    with _metrics_lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    with _metrics_lock:
+        key = _key(name, labels)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram["buckets"][index] += 1
+                break
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+
+def get_metrics():
+    """Return copies of the counters and histograms, keyed by (name, labels)"""
+    with _metrics_lock:
+        return (
+            dict(_counters),
+            {key: {"buckets": list(value["buckets"]), "sum": value["sum"], "count": value["count"]}
+             for key, value in _histograms.items()}
+        )
+
+
+def _collected_metrics():
+    """Counters and gauges read from the other core modules at scrape time"""
+    from core.async_gemini import get_async_stats
+    from core.gemini_client import get_model_registry_stats
+    from core.pdf_extraction import get_pdf_cache_stats
+    from core.rate_limit import get_retry_stats
+    from core.token_budget import get_token_stats
+    from core.youtube_cache import get_youtube_cache_stats
+
+    async_stats = get_async_stats()
+    retry_stats = get_retry_stats()
+    token_stats = get_token_stats(recent=0)
+    registry_stats = get_model_registry_stats()
+    cache_entries = [
+        ("cache_entries", {"cache": cache, "tier": tier}, tier_stats["entries"])
+        for cache, stats in (("pdf", get_pdf_cache_stats()), ("youtube", get_youtube_cache_stats()))
+        if stats is not None
+        for tier, tier_stats in stats.items()
+        if tier_stats is not None
+    ]
+    return cache_entries + [
+        ("gemini_models_created_total", {}, registry_stats["models_created"]),
+        ("gemini_model_reuses_total", {}, registry_stats["model_reuses"]),
+        ("gemini_tokens_total", {"direction": "input"}, token_stats["input_tokens"]),
+        ("gemini_tokens_total", {"direction": "output"}, token_stats["output_tokens"]),
+        ("gemini_upstream_calls_total", {}, async_stats["upstream_calls"]),
+        ("gemini_coalesced_calls_total", {}, async_stats["coalesced_calls"]),
+        ("gemini_in_flight", {}, async_stats["in_flight"]),
+        ("gemini_retries_total", {}, retry_stats["retries"]),
+        ("gemini_final_failures_total", {}, retry_stats["final_failures"]),
+        ("gemini_throttled_seconds_total", {}, retry_stats["throttled_seconds"]),
+        ("gemini_shed_requests_total", {}, retry_stats["shed_requests"]),
+        ("gemini_rejected_prompts_total", {}, token_stats["rejected_prompts"])
+    ]
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_metrics():
+    """Return all metrics in the Prometheus text exposition format"""
+    counters, histograms = get_metrics()
+    samples = {}
+    for (name, labels), value in counters.items():
+        samples.setdefault(name, []).append((labels, value))
+    for name, labels, value in _collected_metrics():
+        samples.setdefault(name, []).append((tuple(labels.items()), value))
+
+    lines = []
+    for name in sorted(set(samples) | {name for name, _ in histograms}):
+        metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        for labels, value in sorted(samples.get(name, [])):
+            lines.append(f"{full_name}{_format_labels(labels)} {value}")
+        for (histogram_name, labels), histogram in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                cumulative += count
+                lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,294 @@
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+
+from core import tracing
+from core.errors import GeminiError, PipelineError, YouTubeError
+from core.gemini import get_gemini_response
+from core.summarization import CHUNK_TOKEN_BUDGET, SUMMARY_LENGTH_GUIDE, summarize_text
+from core.token_budget import estimate_tokens
+from core.youtube_cache import get_cached_video, store_video
+
+# Default seconds to wait for YouTube metadata and transcript lookups
+YOUTUBE_METADATA_TIMEOUT = 10
+YOUTUBE_TRANSCRIPT_TIMEOUT = 20
+
+# Videos fetched and summarized at the same time in batch mode
+MAX_VIDEO_WORKERS = 4
+
+# Shared pool for YouTube network calls. A lookup that times out keeps its
+# thread until the call returns, so the pool is not shut down per request
+_youtube_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="youtube-fetch")
+
+logger = logging.getLogger(__name__)
+
+
+def get_youtube_transcript(youtube_url):
+    """Return the metadata and transcript of a video; raises YouTubeError
+
+    Problems that still leave a usable result (missing metadata, a simulated
+    transcript) are listed in the result's "warnings" instead of raised.
+    """
+    # Simple validation of URL format
+    if not ('youtube.com' in youtube_url or 'youtu.be' in youtube_url):
+        raise YouTubeError("Invalid YouTube URL. Please enter a valid YouTube URL.")
+
+    video_id = extract_video_id(youtube_url)
+    if not video_id:
+        raise YouTubeError("Could not extract video ID from URL. Please check the URL format.")
+
+    try:
+        # Popular videos are served from the cache instead of hitting YouTube again
+        started = time.perf_counter()
+        cached_video = get_cached_video(video_id)
+        tracing.record_cache("youtube", cached_video is not None)
+        if cached_video is not None:
+            return dict(cached_video, warnings=[], timings={"cache": time.perf_counter() - started})
+
+        # Set default values in case we can't get actual data
+        video_title = "YouTube Video"
+        video_author = "YouTube Creator"
+        video_length = 0
+        transcript_text = ""
+        transcript_segments = []
+        simulated = False
+        warnings = []
+
+        # The metadata and transcript lookups are independent, so run them concurrently;
+        # both timeouts count from here, so a hung lookup does not delay the other
+        fetch_started = time.perf_counter()
+        metadata_future = _youtube_executor.submit(
+            tracing.bind(_timed_call), "fetch_metadata", _fetch_video_metadata, youtube_url
+        )
+        transcript_future = _youtube_executor.submit(
+            tracing.bind(_timed_call), "fetch_transcript", _fetch_transcript_segments, video_id
+        )
+        metadata, metadata_error, metadata_seconds = _wait_for_call(
+            metadata_future, fetch_started, float(os.getenv("YOUTUBE_METADATA_TIMEOUT", YOUTUBE_METADATA_TIMEOUT))
+        )
+        segments, transcript_error, transcript_seconds = _wait_for_call(
+            transcript_future, fetch_started, float(os.getenv("YOUTUBE_TRANSCRIPT_TIMEOUT", YOUTUBE_TRANSCRIPT_TIMEOUT))
+        )
+        timings = {"metadata": metadata_seconds, "transcript": transcript_seconds}
+
+        # Use video metadata from pytube when we got it
+        if metadata_error is None:
+            title, author, length = metadata
+            video_title = title or video_title
+            video_author = author or video_author
+            video_length = length or video_length
+        else:
+            warnings.append(f"Could not get video metadata: {metadata_error}")
+
+        # Use the transcript from YouTubeTranscriptApi when we got it
+        if transcript_error is None:
+            transcript_segments = segments
+            transcript_text = " ".join([segment['text'] for segment in segments])
+        else:
+            warnings.append(f"Could not get transcript: {transcript_error}")
+
+        # If we couldn't get a transcript, generate a simulated one
+        if not transcript_text.strip():
+            prompt = f"""
+            Create a simulated transcript for a YouTube video with the following details:
+            Title: {video_title}
+            Author: {video_author}
+            Length: {video_length} seconds
+
+            The transcript should be a plausible representation of what might be said in this video.
+            Focus on creating coherent, informative content related to the title.
+            """
+
+            simulation_started = time.perf_counter()
+            try:
+                transcript_text = get_gemini_response(prompt) or ""
+            except GeminiError as e:
+                warnings.append(str(e))
+                transcript_text = ""
+            simulated = True
+            timings["simulated_transcript"] = time.perf_counter() - simulation_started
+
+        video_info = {
+            "video_id": video_id,
+            "title": video_title,
+            "author": video_author,
+            "length": video_length,
+            "transcript": transcript_text,
+            "segments": transcript_segments,
+            "simulated": simulated
+        }
+        if transcript_text.strip():
+            store_video(video_info, partial=metadata_error is not None)
+
+        for warning in warnings:
+            logger.warning("%s: %s", video_id, warning)
+        timings["total"] = time.perf_counter() - started
+        video_info["warnings"] = warnings
+        video_info["timings"] = timings
+        return video_info
+
+    except PipelineError:
+        raise
+    except Exception as e:
+        raise YouTubeError(f"Error processing YouTube video: {e}") from e
+
+
+def _fetch_video_metadata(youtube_url):
+    """Return (title, author, length) for a video using pytube"""
+    from pytube import YouTube
+
+    yt = YouTube(youtube_url)
+    return yt.title, yt.author, yt.length
+
+
+def _fetch_transcript_segments(video_id):
+    """Return the timed transcript segments of a video"""
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+    return [
+        {"text": item['text'], "start": item.get('start'), "duration": item.get('duration')}
+        for item in transcript_list
+    ]
+
+
+def _timed_call(stage, func, *args):
+    """Run func in a span named stage and return (result, error, seconds) so failures are timed too"""
+    started = time.perf_counter()
+    with tracing.span(stage) as span:
+        try:
+            return func(*args), None, time.perf_counter() - started
+        except Exception as e:
+            span.fail(e)
+            return None, e, time.perf_counter() - started
+
+
+def _wait_for_call(future, started, timeout):
+    """Wait for a _timed_call future until timeout seconds after started, turning a timeout into an error result"""
+    try:
+        return future.result(timeout=max(0.0, started + timeout - time.perf_counter()))
+    except FutureTimeoutError:
+        return None, TimeoutError(f"timed out after {timeout:.0f}s"), timeout
+
+
+# Batch processing
+def expand_youtube_urls(urls):
+    """Resolve video and playlist URLs into (de-duplicated video URLs, warnings)"""
+    video_urls = []
+    warnings = []
+    seen_ids = set()
+
+    for url in urls:
+        url = url.strip()
+        if not url:
+            continue
+
+        candidates = [url]
+        if 'youtube.com/playlist' in url:
+            try:
+                from pytube import Playlist
+
+                candidates = list(Playlist(url).video_urls)
+            except Exception as e:
+                warnings.append(f"Could not load playlist {url}: {e}")
+                continue
+
+        for video_url in candidates:
+            video_id = extract_video_id(video_url)
+            if not video_id:
+                warnings.append(f"Skipping invalid YouTube URL: {video_url}")
+            elif video_id not in seen_ids:
+                seen_ids.add(video_id)
+                video_urls.append(video_url)
+
+    return video_urls, warnings
+
+
+def summarize_videos(video_urls, length="medium", max_workers=MAX_VIDEO_WORKERS):
+    """Fetch and summarize several videos concurrently, yielding each result as it completes"""
+    if not video_urls:
+        return
+
+    def process(index, video_url):
+        result = {
+            "index": index, "url": video_url, "title": video_url, "author": None,
+            "summary": None, "error": None, "warnings": []
+        }
+        try:
+            with tracing.trace("summarize_video", url=video_url):
+                video_info = get_youtube_transcript(video_url)
+                result["title"] = video_info["title"]
+                result["author"] = video_info["author"]
+                result["warnings"] = video_info["warnings"]
+                result["summary"] = summarize_text(video_info["transcript"], length)
+            if not result["summary"]:
+                result["error"] = "Could not summarize the video."
+        except PipelineError as e:
+            result["error"] = str(e)
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(video_urls))) as executor:
+        futures = [executor.submit(tracing.bind(process), index, url) for index, url in enumerate(video_urls)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def summarize_course(video_results, length="medium"):
+    """Combine per-video summaries into one course-level summary; raises GeminiError"""
+    ordered = sorted((result for result in video_results if result["summary"]), key=lambda result: result["index"])
+    sections = "\n\n".join(
+        f"VIDEO {number}: {result['title']}\n{result['summary']}"
+        for number, result in enumerate(ordered, 1)
+    )
+
+    # Very large courses fall back to the chunked summarization engine
+    if estimate_tokens(sections) > CHUNK_TOKEN_BUDGET:
+        return summarize_text(sections, length)
+
+    prompt = f"""
+    The following are summaries of the videos in a course, in order.
+    Write a course-level summary that explains what the course covers and how the
+    videos build on each other. {SUMMARY_LENGTH_GUIDE.get(length, SUMMARY_LENGTH_GUIDE["medium"])}
+
+    VIDEO SUMMARIES:
+    {sections}
+    """
+    return get_gemini_response(prompt)
+
+
+def extract_video_id(youtube_url):
+    """Extract the video ID from a YouTube URL"""
+    # Simple approach to extract video ID
+    if 'youtu.be/' in youtube_url:
+        # Handle shortened URLs
+        parts = youtube_url.split('youtu.be/')
+        if len(parts) > 1:
+            return parts[1].split('?')[0].split('&')[0]
+    elif 'youtube.com/watch' in youtube_url:
+        # Handle standard URLs
+        if 'v=' in youtube_url:
+            v_index = youtube_url.index('v=')
+            video_id = youtube_url[v_index+2:].split('&')[0].split('?')[0]
+            return video_id
+    elif 'youtube.com/embed/' in youtube_url:
+        # Handle embed URLs
+        parts = youtube_url.split('youtube.com/embed/')
+        if len(parts) > 1:
+            return parts[1].split('?')[0].split('&')[0]
+
+    # If we couldn't extract the ID, try a more comprehensive approach with regex
+    patterns = [
+        r'(?:youtube\.com/watch\?v=|youtu\.be/)([\w-]+)',  # Standard and shortened URLs
+        r'youtube\.com/embed/([\w-]+)',                     # Embed URLs
+        r'youtube\.com/v/([\w-]+)',                        # Old embed URLs
+        r'youtube\.com/\?v=([\w-]+)'                       # Another variation
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, youtube_url)
+        if match:
+            return match.group(1)
+
+    return None
@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+
+from core.response_cache import TieredCache
+
+# Video cache defaults, overridable through environment variables
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# Simulated transcripts and missing metadata stand in for a failed fetch,
+# so such entries are retried sooner
+DEFAULT_SIMULATED_TTL_SECONDS = 60 * 60
+DEFAULT_MEMORY_ENTRIES = 256
+DEFAULT_DISK_CACHE_PATH = os.path.join(".cache", "youtube.sqlite3")
+DEFAULT_DISK_ENTRIES = 5000
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    """Return the two-tier video cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TieredCache(
+                    memory_entries=int(os.getenv("YOUTUBE_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                    disk_path=os.getenv("YOUTUBE_CACHE_PATH", DEFAULT_DISK_CACHE_PATH),
+                    disk_entries=int(os.getenv("YOUTUBE_CACHE_DISK_ENTRIES", DEFAULT_DISK_ENTRIES)),
+                    ttl_seconds=int(os.getenv("YOUTUBE_CACHE_TTL", DEFAULT_TTL_SECONDS))
+                )
+    return _cache
+
+
+def get_cached_video(video_id):
+    """Return cached metadata and transcript for a video ID, or None"""
+    video = _get_cache().get(video_id)
+    if video is None:
+        return None
+    # Entries can carry a shorter lifetime than the cache-wide TTL
+    expires_at = video.get("expires_at")
+    if expires_at:
+        if expires_at < time.time():
+            return None
+        video = {key: value for key, value in video.items() if key != "expires_at"}
+    return video
+
+
+def store_video(video, partial=False):
+    """Cache a video's metadata and transcript under its video ID"""
+    if partial or video.get("simulated"):
+        ttl_seconds = int(os.getenv("YOUTUBE_SIMULATED_CACHE_TTL", DEFAULT_SIMULATED_TTL_SECONDS))
+        video = dict(video, expires_at=time.time() + ttl_seconds)
+
+    _get_cache().set(video["video_id"], video)
+
+
+def get_youtube_cache_stats():
+    """Return hit/miss counters for both tiers of the video cache, or None before its first use"""
+    # Reading the statistics must not create the cache (and its SQLite file)
+    return _cache.stats() if _cache is not None else None
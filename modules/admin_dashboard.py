@@ -0,0 +1,212 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from core import tracing
+from core.async_gemini import get_async_stats
+from core.gemini_client import get_model_registry_stats
+from core.pdf_extraction import get_pdf_cache_stats
+from core.rate_limit import get_retry_stats
+from core.token_budget import get_token_stats
+from core.youtube_cache import get_youtube_cache_stats
+from profiling import clear_profiles, get_profiles
+
+# Windows (in minutes) over which request rates are shown
+RATE_WINDOWS = (1, 5, 15)
+
+
+def show():
+    st.title("🛠️ Performance Dashboard")
+    st.write("Live request rates, latencies, cache efficiency and Gemini errors for this server process.")
+
+    _, refresh_column = st.columns([3, 1])
+    with refresh_column:
+        if st.button("Refresh"):
+            st.rerun()
+
+    counters, histograms = tracing.get_metrics()
+    traces = tracing.get_recent_traces(tracing.RECENT_TRACES)
+
+    show_request_rates(counters, traces)
+    show_latency(histograms)
+    show_caches(counters)
+    show_gemini()
+    show_slowest()
+    show_profiler()
+
+
+def show_request_rates(counters, traces):
+    st.subheader("Requests")
+    now = time.time()
+    features = sorted({feature for (metric, labels), _ in counters.items()
+                       if metric == "requests_total" for name, feature in labels if name == "feature"})
+    if not features:
+        st.info("No requests have been traced yet.")
+        return
+
+    rows = []
+    for feature in features:
+        row = {
+            "feature": feature,
+            "total": counters.get(("requests_total", (("feature", feature), ("status", "ok"))), 0)
+            + counters.get(("requests_total", (("feature", feature), ("status", "error"))), 0),
+            "errors": counters.get(("requests_total", (("feature", feature), ("status", "error"))), 0)
+        }
+        for minutes in RATE_WINDOWS:
+            recent = sum(1 for record in traces if record["feature"] == feature and now - record["started_at"] <= minutes * 60)
+            row[f"per min ({minutes}m)"] = round(recent / minutes, 2)
+        rows.append(row)
+    st.dataframe(pd.DataFrame(rows).set_index("feature"), use_container_width=True)
+    st.caption(f"Rates are computed from the last {tracing.RECENT_TRACES} traces.")
+
+
+def show_latency(histograms):
+    st.subheader("Latency")
+    requests = {dict(labels)["feature"]: value for (name, labels), value in histograms.items()
+                if name == "request_duration_seconds"}
+    if not requests:
+        return
+
+    bounds = [f"≤{bound:g}s" for bound in tracing.LATENCY_BUCKETS]
+    feature = st.selectbox("Feature", sorted(requests))
+    histogram = requests[feature]
+    counts = pd.DataFrame({"requests": histogram["buckets"]}, index=pd.Index(bounds, name="duration"))
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        st.bar_chart(counts)
+    with col2:
+        st.metric("Requests", histogram["count"])
+        st.metric("Mean", f"{histogram['sum'] / histogram['count']:.2f}s" if histogram["count"] else "-")
+
+    # Where the time goes: mean duration of each stage for this feature
+    stages = []
+    for (name, labels), value in histograms.items():
+        labels = dict(labels)
+        if name == "stage_duration_seconds" and labels.get("feature") == feature and value["count"]:
+            stages.append({
+                "stage": labels["stage"],
+                "calls": value["count"],
+                "mean seconds": round(value["sum"] / value["count"], 4),
+                "total seconds": round(value["sum"], 3)
+            })
+    if stages:
+        st.dataframe(
+            pd.DataFrame(stages).sort_values("total seconds", ascending=False).set_index("stage"),
+            use_container_width=True
+        )
+
+
+def show_caches(counters):
+    st.subheader("Caches")
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == "cache_lookups_total":
+            labels = dict(labels)
+            lookups.setdefault(labels["cache"], {"hit": 0, "miss": 0})[labels["result"]] += value
+    if not lookups:
+        st.info("No cache lookups yet.")
+        return
+
+    columns = st.columns(len(lookups))
+    for column, (cache, counts) in zip(columns, sorted(lookups.items())):
+        total = counts["hit"] + counts["miss"]
+        column.metric(f"{cache} cache hit ratio", f"{counts['hit'] / total:.0%}", f"{total} lookups", delta_color="off")
+
+    sizes = []
+    for cache, stats in (("pdf", get_pdf_cache_stats()), ("youtube", get_youtube_cache_stats())):
+        if stats is not None:
+            sizes.extend(
+                f"{cache} {tier}: {tier_stats['entries']}" for tier, tier_stats in stats.items() if tier_stats is not None
+            )
+    if sizes:
+        st.caption("Entries held: " + ", ".join(sizes))
+
+
+def show_gemini():
+    st.subheader("Gemini")
+    retry_stats = get_retry_stats()
+    async_stats = get_async_stats()
+    token_stats = get_token_stats(recent=0)
+    registry_stats = get_model_registry_stats()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Upstream calls", async_stats["upstream_calls"])
+    col1.metric("Coalesced calls", async_stats["coalesced_calls"])
+    col2.metric("Retries", retry_stats["retries"])
+    col2.metric("Failed after retries", retry_stats["final_failures"])
+    col3.metric("Throttled waits", retry_stats["throttled_waits"])
+    col3.metric("Shed requests", retry_stats["shed_requests"])
+    col4.metric("Input tokens", f"{token_stats['input_tokens']:,}")
+    col4.metric("Output tokens", f"{token_stats['output_tokens']:,}")
+    st.caption(
+        f"In flight now: {async_stats['in_flight']} (peak {async_stats['peak_in_flight']}). "
+        f"Prompts rejected as too large: {token_stats['rejected_prompts']}. "
+        f"Model clients created: {registry_stats['models_created']}, "
+        f"reused for {registry_stats['model_reuses']} requests ({registry_stats['reuse_ratio']:.0%})."
+    )
+
+
+def show_slowest():
+    st.subheader("Slowest recent requests")
+    slowest = tracing.get_slowest_traces(10)
+    if not slowest:
+        st.info("No requests have been traced yet.")
+        return
+
+    for record in slowest:
+        started = datetime.fromtimestamp(record["started_at"]).strftime("%H:%M:%S")
+        status = "❌" if record["status"] == "error" else "✅"
+        with st.expander(f"{status} {record['feature']} — {record['seconds']:.2f}s at {started} ({record['trace_id']})"):
+            if record["error"]:
+                st.error(record["error"])
+            spans = [
+                {
+                    "stage": span["name"],
+                    "seconds": span["seconds"],
+                    "error": span["error"],
+                    "details": ", ".join(f"{key}={value}" for key, value in span["attributes"].items())
+                }
+                for span in record["spans"]
+            ]
+            if spans:
+                st.dataframe(pd.DataFrame(spans), use_container_width=True, hide_index=True)
+
+
+def show_profiler():
+    st.subheader("Profiler")
+    # The flag lives outside the widget's own key, which Streamlit discards
+    # once the toggle is no longer rendered (i.e. on every other page)
+    st.toggle(
+        "Profile script runs",
+        value=st.session_state.get("profile_runs", False),
+        key="profile_runs_toggle",
+        on_change=lambda: st.session_state.update(profile_runs=st.session_state.profile_runs_toggle),
+        help="Sample the call stack of every script run in this session until switched off. "
+             "Open another page, use it, then come back here to see where the time went."
+    )
+
+    profiles = get_profiles()
+    if not profiles:
+        st.caption("No profiles recorded yet.")
+        return
+
+    labels = [
+        f"{datetime.fromtimestamp(entry['finished_at']).strftime('%H:%M:%S')} — {entry['label']} "
+        f"({entry['profiler'].seconds:.2f}s, {entry['profiler'].samples} samples)"
+        for entry in profiles
+    ]
+    index = st.selectbox("Profile", range(len(profiles)), format_func=lambda i: labels[i])
+    profiler = profiles[index]["profiler"]
+    if profiler.samples:
+        st.dataframe(pd.DataFrame(profiler.top_functions()), use_container_width=True, hide_index=True)
+    st.download_button(
+        label="Download collapsed stacks (flame graph)",
+        data=profiler.collapsed(),
+        file_name="profile.folded",
+        mime="text/plain"
+    )
+    if st.button("Clear profiles"):
+        clear_profiles()
+        st.rerun()
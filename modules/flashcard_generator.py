@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import generate_flashcards, extract_text_from_pdf, get_youtube_transcript
+from utils import generate_flashcards, extract_text_from_pdf, get_youtube_transcript, peek_stream, render_stream, parse_flashcards, stream_flashcards, format_flashcard
 import json
 
 def show():
@@ -58,37 +58,33 @@ def show():
     col1, col2 = st.columns(2)
     with col1:
         num_cards = st.slider("Number of flashcards:", min_value=5, max_value=20, value=10)
+    with col2:
+        structured = st.toggle(
+            "Structured mode",
+            value=True,
+            help="Generate validated JSON cards; malformed cards are regenerated individually"
+        )
 
     # Generate flashcards button
     if st.button("Generate Flashcards"):
         if not content:
             st.warning("Please provide content for flashcard generation.")
+        elif structured:
+            show_structured_flashcards(content, num_cards)
         else:
             with st.spinner("Generating flashcards..."):
-                flashcards_text = generate_flashcards(content, num_cards)
+                flashcards_stream = peek_stream(generate_flashcards(content, num_cards, stream=True))
 
-                if flashcards_text:
+                if flashcards_stream:
                     st.subheader("Generated Flashcards")
 
+                    # Show the raw cards while they stream in, then replace them with expanders
+                    raw_placeholder = st.empty()
+                    flashcards_text = render_stream(flashcards_stream, raw_placeholder)
+                    raw_placeholder.empty()
+
                     # Parse the flashcards text into individual cards
-                    cards = []
-                    current_card = {}
-
-                    lines = flashcards_text.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith("CARD"):
-                            if current_card and 'front' in current_card and 'back' in current_card:
-                                cards.append(current_card)
-                            current_card = {}
-                        elif line.startswith("Front:"):
-                            current_card['front'] = line[6:].strip()
-                        elif line.startswith("Back:"):
-                            current_card['back'] = line[5:].strip()
-
-                    # Add the last card if it exists
-                    if current_card and 'front' in current_card and 'back' in current_card:
-                        cards.append(current_card)
+                    cards = parse_flashcards(flashcards_text)
 
                     # Display flashcards
                     for i, card in enumerate(cards):
@@ -112,3 +108,31 @@ def show():
                     )
 
     # Removed tips section
+
+def show_structured_flashcards(content, num_cards):
+    """Generate flashcards in JSON mode, showing each card as soon as it is validated"""
+    cards = []
+    with st.spinner("Generating flashcards..."):
+        st.subheader("Generated Flashcards")
+        for card in stream_flashcards(content, num_cards):
+            cards.append(card)
+            with st.expander(f"Flashcard {len(cards)}: {card.front}"):
+                st.markdown(f"**Answer:** {card.back}")
+
+    if not cards:
+        return
+    if len(cards) < num_cards:
+        st.warning(f"Only {len(cards)} of {num_cards} flashcards could be generated.")
+
+    st.download_button(
+        label="Download Flashcards (JSON)",
+        data=json.dumps([card.model_dump() for card in cards], indent=2),
+        file_name="flashcards.json",
+        mime="application/json"
+    )
+    st.download_button(
+        label="Download Flashcards (Text)",
+        data="\n\n".join(format_flashcard(i + 1, card) for i, card in enumerate(cards)),
+        file_name="flashcards.txt",
+        mime="text/plain"
+    )
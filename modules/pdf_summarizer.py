@@ -1,6 +1,11 @@
 import streamlit as st
-from utils import extract_text_from_pdf, summarize_text
+from utils import extract_text_from_pdf, summarize_text, peek_stream, render_stream, summarize_pdf_job, generate_study_pack, parse_flashcards
+from core.job_queue import submit_job, get_jobs, DONE, FAILED
 from streamlit_extras.stylable_container import stylable_container
+import io
+import json
+import time
+import zipfile
 
 def show():
     # Premium header with gradient and icon
@@ -16,6 +21,20 @@ def show():
     </div>
     """, unsafe_allow_html=True)
 
+    # Mode selection: one document, or a batch processed in the background
+    mode = st.radio(
+        "Mode",
+        options=["Single PDF", "Batch", "Study pack"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    if mode == "Batch":
+        show_batch()
+        return
+    if mode == "Study pack":
+        show_study_pack()
+        return
+
     # Main content in a premium card container with subtle gradient
     with stylable_container(
         key="pdf_upload_container",
@@ -222,12 +241,10 @@ def show():
                         </div>
                         """, unsafe_allow_html=True)
 
-                        summary = summarize_text(pdf_text, summary_length)
-
-                        if summary:
-                            # Clear the spinner
-                            st.empty()
+                        # Stream the summary so text appears as soon as Gemini starts answering
+                        summary_stream = peek_stream(summarize_text(pdf_text, summary_length, stream=True))
 
+                        if summary_stream:
                             # Display summary in a premium container with animation
                             with stylable_container(
                                 key="summary_container",
@@ -255,7 +272,11 @@ def show():
                                 st.markdown(header_html, unsafe_allow_html=True)
 
                                 # Display the summary text in a normal text component to avoid code formatting
-                                st.markdown(f'<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{summary}</div>', unsafe_allow_html=True)
+                                summary = render_stream(
+                                    summary_stream,
+                                    st.empty(),
+                                    '<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{}</div>'
+                                )
 
                                 # Action buttons row with enhanced styling
                                 st.markdown("<div style='margin: 25px 0 10px 0; height: 1px; background: linear-gradient(90deg, rgba(203, 213, 225, 0) 0%, rgba(203, 213, 225, 1) 50%, rgba(203, 213, 225, 0) 100%);'></div>", unsafe_allow_html=True)
@@ -297,3 +318,151 @@ def show():
     }
     </style>
     """, unsafe_allow_html=True)
+
+
+def show_batch():
+    st.write("Upload several PDFs; each one is extracted and summarized in the background.")
+
+    uploaded_files = st.file_uploader(
+        "Upload PDF files",
+        type=["pdf"],
+        accept_multiple_files=True,
+        label_visibility="collapsed"
+    )
+    summary_length = st.radio(
+        "Summary length",
+        options=["short", "medium", "long"],
+        index=1,
+        horizontal=True,
+        key="pdf_batch_summary_length"
+    )
+
+    # Only job IDs live in session state; the jobs themselves survive reruns in the worker pool
+    job_ids = st.session_state.setdefault("pdf_jobs", [])
+
+    if st.button("✨ Summarize PDFs", use_container_width=True, type="primary"):
+        if not uploaded_files:
+            st.warning("Please upload at least one PDF file.")
+        for uploaded_file in uploaded_files or []:
+            job = submit_job(uploaded_file.name, summarize_pdf_job, uploaded_file.getvalue(), summary_length)
+            job_ids.append(job.id)
+
+    jobs = get_jobs(job_ids)
+    if not jobs:
+        return
+
+    st.subheader("Jobs")
+    for job in jobs:
+        col1, col2 = st.columns([2, 3])
+        with col1:
+            st.markdown(f"**{job.name}**")
+        with col2:
+            if job.status == FAILED:
+                st.error(job.error)
+            else:
+                st.progress(job.progress, text=job.stage)
+        if job.status == DONE:
+            with st.expander(f"Summary of {job.name}"):
+                st.markdown(job.result)
+
+    finished = [job for job in jobs if job.status == DONE]
+    col1, col2 = st.columns(2)
+    with col1:
+        if finished:
+            st.download_button(
+                label=f"💾 Download {len(finished)} Summaries (ZIP)",
+                data=_summaries_zip(finished),
+                file_name="pdf_summaries.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+    with col2:
+        if st.button("Clear finished jobs", use_container_width=True):
+            st.session_state["pdf_jobs"] = [job.id for job in jobs if not job.finished]
+            st.rerun()
+
+    # Poll until every job has finished
+    if any(not job.finished for job in jobs):
+        time.sleep(1)
+        st.rerun()
+
+def _summaries_zip(jobs):
+    """Bundle finished job summaries into an in-memory zip archive"""
+    buffer = io.BytesIO()
+    used_names = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for job in jobs:
+            base_name = job.name.rsplit('.', 1)[0]
+            file_name = f"{base_name}_summary.txt"
+            suffix = 2
+            while file_name in used_names:
+                file_name = f"{base_name}_summary_{suffix}.txt"
+                suffix += 1
+            used_names.add(file_name)
+            archive.writestr(file_name, job.result)
+    return buffer.getvalue()
+
+def show_study_pack():
+    st.write("Extract a PDF once and generate its summary, quiz and flashcards together.")
+
+    uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"], key="pdf_study_pack_file")
+    if uploaded_file is None:
+        return
+
+    with st.spinner("Extracting text from PDF..."):
+        pdf_text = extract_text_from_pdf(uploaded_file)
+    if not pdf_text:
+        st.error("Failed to extract text from the PDF.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        summary_length = st.radio(
+            "Summary length",
+            options=["short", "medium", "long"],
+            index=1,
+            horizontal=True,
+            key="pdf_study_pack_summary_length"
+        )
+    with col2:
+        num_questions = st.slider("Quiz questions:", min_value=3, max_value=10, value=5)
+    with col3:
+        num_cards = st.slider("Flashcards:", min_value=5, max_value=20, value=10)
+
+    if not st.button("✨ Generate Study Pack", use_container_width=True, type="primary"):
+        return
+
+    with st.spinner("Generating summary, quiz and flashcards..."):
+        pack = generate_study_pack(pdf_text, summary_length, num_questions, num_cards)
+    if not pack:
+        return
+
+    cards = parse_flashcards(pack["flashcards"])
+    summary_tab, quiz_tab, flashcards_tab = st.tabs(["📋 Summary", "❓ Quiz", "🗃️ Flashcards"])
+    with summary_tab:
+        st.markdown(pack["summary"])
+    with quiz_tab:
+        st.markdown(pack["quiz"])
+    with flashcards_tab:
+        for i, card in enumerate(cards):
+            with st.expander(f"Flashcard {i+1}: {card['front']}"):
+                st.markdown(f"**Answer:** {card['back']}")
+
+    st.download_button(
+        label="💾 Download Study Pack (ZIP)",
+        data=_study_pack_zip(uploaded_file.name, pack, cards),
+        file_name="study_pack.zip",
+        mime="application/zip",
+        use_container_width=True
+    )
+
+def _study_pack_zip(name, pack, cards):
+    """Bundle the summary, quiz and flashcards of one PDF into a ZIP archive"""
+    stem = name.rsplit(".", 1)[0]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f"{stem}_summary.txt", pack["summary"])
+        archive.writestr(f"{stem}_quiz.txt", pack["quiz"])
+        archive.writestr(f"{stem}_flashcards.txt", pack["flashcards"])
+        archive.writestr(f"{stem}_flashcards.json", json.dumps(cards, indent=2))
+    return buffer.getvalue()
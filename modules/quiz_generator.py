@@ -1,5 +1,6 @@
 import streamlit as st
-from utils import generate_quiz, extract_text_from_pdf, get_youtube_transcript
+from utils import generate_quiz, extract_text_from_pdf, get_youtube_transcript, peek_stream, render_stream, stream_quiz_questions, format_question
+import json
 
 def show():
     st.title("❓ Quiz Generator")
@@ -57,18 +58,27 @@ def show():
     col1, col2 = st.columns(2)
     with col1:
         num_questions = st.slider("Number of questions:", min_value=3, max_value=10, value=5)
+    with col2:
+        structured = st.toggle(
+            "Structured mode",
+            value=True,
+            help="Generate validated JSON questions; malformed questions are regenerated individually"
+        )
 
     # Generate quiz button
     if st.button("Generate Quiz"):
         if not content:
             st.warning("Please provide content for quiz generation.")
+        elif structured:
+            show_structured_quiz(content, num_questions)
         else:
             with st.spinner("Generating quiz questions..."):
-                quiz = generate_quiz(content, num_questions)
+                quiz_stream = peek_stream(generate_quiz(content, num_questions, stream=True))
 
-                if quiz:
+                if quiz_stream:
                     st.subheader("Generated Quiz")
-                    st.markdown(quiz)
+                    # Render questions as they are generated
+                    quiz = render_stream(quiz_stream, st.empty())
 
                     # Download option
                     quiz_bytes = quiz.encode()
@@ -80,3 +90,33 @@ def show():
                     )
 
     # Removed tips section
+
+def show_structured_quiz(content, num_questions):
+    """Generate the quiz in JSON mode, showing each question as soon as it is validated"""
+    questions = []
+    with st.spinner("Generating quiz questions..."):
+        st.subheader("Generated Quiz")
+        for question in stream_quiz_questions(content, num_questions):
+            questions.append(question)
+            st.markdown(f"**Q{len(questions)}: {question.question}**")
+            st.markdown("\n".join(f"- **{letter}:** {option}" for letter, option in zip("ABCD", question.options)))
+            with st.expander("Show answer"):
+                st.markdown(f"**Correct Answer:** {question.answer}\n\n{question.explanation}")
+
+    if not questions:
+        return
+    if len(questions) < num_questions:
+        st.warning(f"Only {len(questions)} of {num_questions} questions could be generated.")
+
+    st.download_button(
+        label="Download Quiz",
+        data="\n\n".join(format_question(i + 1, question) for i, question in enumerate(questions)),
+        file_name="generated_quiz.txt",
+        mime="text/plain"
+    )
+    st.download_button(
+        label="Download Quiz (JSON)",
+        data=json.dumps([question.model_dump() for question in questions], indent=2),
+        file_name="generated_quiz.json",
+        mime="application/json"
+    )
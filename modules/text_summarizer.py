@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import summarize_text
+from utils import summarize_incrementally, summarize_text, peek_stream, render_stream
 from streamlit_extras.stylable_container import stylable_container
 
 def show():
@@ -92,6 +92,22 @@ def show():
                 label_visibility="collapsed"
             )
 
+        with col2:
+            st.markdown("""
+            <div style="display: flex; align-items: center; margin-bottom: 15px;">
+                <div style="background: linear-gradient(90deg, #2563eb 0%, #3b82f6 100%); width: 24px; height: 24px; border-radius: 6px; display: flex; align-items: center; justify-content: center; margin-right: 10px;">
+                    <span style="color: white; font-size: 12px;">🔁</span>
+                </div>
+                <p style="margin: 0; font-weight: 600; color: #334155; font-size: 1rem;">Editing Mode</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            incremental = st.toggle(
+                "Incremental updates",
+                help="Summarize long text in blocks and keep their summaries, so after an edit "
+                     "only the changed blocks are summarized again before the final merge"
+            )
+
         # Premium generate button with gradient and animation
         st.markdown("""
         <style>
@@ -138,12 +154,17 @@ def show():
                 </style>
                 """, unsafe_allow_html=True)
 
-                summary = summarize_text(text_input, summary_length)
-
-                if summary:
-                    # Clear the spinner
-                    st.empty()
-
+                # Stream the summary so text appears as soon as Gemini starts answering
+                if incremental:
+                    # Block summaries from earlier runs are reused for unchanged blocks
+                    block_summaries = st.session_state.setdefault("summary_blocks", {})
+                    summary_stream = peek_stream(
+                        summarize_incrementally(text_input, summary_length, block_summaries, stream=True)
+                    )
+                else:
+                    summary_stream = peek_stream(summarize_text(text_input, summary_length, stream=True))
+
+                if summary_stream:
                     # Display summary in a premium container with animation
                     with stylable_container(
                         key="summary_container",
@@ -171,7 +192,11 @@ def show():
                         st.markdown(header_html, unsafe_allow_html=True)
 
                         # Display the summary text in a normal text component to avoid code formatting
-                        st.markdown(f'<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{summary}</div>', unsafe_allow_html=True)
+                        summary = render_stream(
+                            summary_stream,
+                            st.empty(),
+                            '<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{}</div>'
+                        )
 
                         # Action buttons row with enhanced styling
                         st.markdown("<div style='margin: 25px 0 10px 0; height: 1px; background: linear-gradient(90deg, rgba(203, 213, 225, 0) 0%, rgba(203, 213, 225, 1) 50%, rgba(203, 213, 225, 0) 100%);'></div>", unsafe_allow_html=True)
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import get_youtube_transcript, summarize_text
+from utils import get_youtube_transcript, summarize_text, peek_stream, render_stream, expand_youtube_urls, summarize_videos, summarize_course
 from streamlit_extras.stylable_container import stylable_container
 
 def show():
@@ -16,6 +16,17 @@ def show():
     </div>
     """, unsafe_allow_html=True)
 
+    # Mode selection: one video, or a batch of videos and playlists
+    mode = st.radio(
+        "Mode",
+        options=["Single video", "Batch / playlist"],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    if mode == "Batch / playlist":
+        show_batch()
+        return
+
     # Main content in a premium card container with subtle gradient
     with stylable_container(
         key="youtube_input_container",
@@ -236,12 +247,10 @@ def show():
                             </div>
                             """, unsafe_allow_html=True)
 
-                            summary = summarize_text(video_info["transcript"], summary_length)
-
-                            if summary:
-                                # Clear the spinner
-                                st.empty()
+                            # Stream the summary so text appears as soon as Gemini starts answering
+                            summary_stream = peek_stream(summarize_text(video_info["transcript"], summary_length, stream=True))
 
+                            if summary_stream:
                                 # Display summary in a premium container with animation
                                 with stylable_container(
                                     key="summary_container",
@@ -269,7 +278,11 @@ def show():
                                     st.markdown(header_html, unsafe_allow_html=True)
 
                                     # Display the summary text in a normal text component to avoid code formatting
-                                    st.markdown(f'<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{summary}</div>', unsafe_allow_html=True)
+                                    summary = render_stream(
+                                        summary_stream,
+                                        st.empty(),
+                                        '<div style="line-height: 1.8; color: #334155; font-size: 1.05rem; padding: 0 5px;">{}</div>'
+                                    )
 
                                     # Action buttons row with enhanced styling
                                     st.markdown("<div style='margin: 25px 0 10px 0; height: 1px; background: linear-gradient(90deg, rgba(203, 213, 225, 0) 0%, rgba(203, 213, 225, 1) 50%, rgba(203, 213, 225, 0) 100%);'></div>", unsafe_allow_html=True)
@@ -335,3 +348,71 @@ def show():
     }
     </style>
     """, unsafe_allow_html=True)
+
+
+def show_batch():
+    st.write("Summarize several lectures at once. Enter one video or playlist URL per line.")
+
+    urls_input = st.text_area(
+        "YouTube video or playlist URLs",
+        height=180,
+        placeholder="https://www.youtube.com/watch?v=...\nhttps://www.youtube.com/playlist?list=...",
+        label_visibility="collapsed"
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        summary_length = st.radio(
+            "Summary length",
+            options=["short", "medium", "long"],
+            index=1,
+            horizontal=True,
+            key="youtube_batch_summary_length"
+        )
+    with col2:
+        create_course_summary = st.checkbox("Also create a combined course summary", value=True)
+
+    if st.button("✨ Summarize Videos", use_container_width=True, type="primary"):
+        with st.spinner("Resolving videos..."):
+            video_urls = expand_youtube_urls(urls_input.splitlines())
+
+        if not video_urls:
+            st.warning("Please enter at least one valid YouTube URL.")
+            return
+
+        # Show each video as soon as its summary is ready
+        progress = st.progress(0.0, text=f"Summarizing {len(video_urls)} videos...")
+        results = []
+        for result in summarize_videos(video_urls, summary_length):
+            results.append(result)
+            progress.progress(len(results) / len(video_urls), text=f"Summarized {len(results)} of {len(video_urls)} videos")
+            with st.expander(f"🎥 {result['title']}"):
+                for warning in result["warnings"]:
+                    st.warning(warning)
+                if result["summary"]:
+                    st.markdown(result["summary"])
+                else:
+                    st.error(result["error"])
+        progress.empty()
+
+        summarized = [result for result in results if result["summary"]]
+        course_summary = None
+        if create_course_summary and len(summarized) > 1:
+            with st.spinner("Creating course summary..."):
+                course_summary = summarize_course(summarized, summary_length)
+            if course_summary:
+                st.subheader("Course Summary")
+                st.markdown(course_summary)
+
+        if summarized:
+            # Download option with every summary in playlist order
+            sections = [f"# {result['title']}\n{result['url']}\n\n{result['summary']}" for result in sorted(summarized, key=lambda result: result["index"])]
+            if course_summary:
+                sections.insert(0, f"# Course Summary\n\n{course_summary}")
+            st.download_button(
+                label="💾 Download Summaries",
+                data="\n\n".join(sections).encode(),
+                file_name="youtube_batch_summary.md",
+                mime="text/markdown",
+                use_container_width=True
+            )
@@ -0,0 +1,116 @@
+"""On-demand sampling profiler for Streamlit script runs.
+
+While a run is profiled, a background thread records the script thread's
+call stack every few milliseconds. That costs far less than a tracing
+profiler such as cProfile, so it can be switched on in a live app. Finished
+profiles are kept in memory for the admin dashboard.
+"""
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# Seconds between stack samples
+DEFAULT_INTERVAL = 0.005
+# Finished profiles kept in memory
+MAX_PROFILES = 20
+# Frames kept per sample, counted from the innermost one
+MAX_STACK_DEPTH = 128
+
+_profiles = deque(maxlen=MAX_PROFILES)
+_profiles_lock = threading.Lock()
+
+
+class SamplingProfiler:
+    """Samples the call stack of one thread from a background thread"""
+
+    def __init__(self, thread_id=None, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self._started
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            # Stored outermost first, as in collapsed-stack (flame graph) files
+            self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def top_functions(self, limit=25):
+        """Return the functions seen most often, with self and total sample shares"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+
+        rows = []
+        for function, count in total.most_common():
+            filename, line, name = function
+            rows.append({
+                "function": name,
+                "location": f"{filename}:{line}",
+                "self_percent": round(100 * own[function] / self.samples, 1) if self.samples else 0.0,
+                "total_percent": round(100 * count / self.samples, 1) if self.samples else 0.0
+            })
+        rows.sort(key=lambda row: (row["self_percent"], row["total_percent"]), reverse=True)
+        return rows[:limit]
+
+    def collapsed(self):
+        """Return the samples in collapsed-stack format for flame graph tools"""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            frames = ";".join(f"{name} ({filename.rsplit('/', 1)[-1]}:{line})" for filename, line, name in stack)
+            lines.append(f"{frames} {count}")
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile_run(label, interval=DEFAULT_INTERVAL):
+    """Profile the current thread for the duration of the block and keep the result"""
+    profiler = SamplingProfiler(interval=interval).start()
+    try:
+        yield profiler
+    finally:
+        # Also reached when Streamlit stops or reruns the script with an exception
+        profiler.stop()
+        with _profiles_lock:
+            _profiles.append({"label": label, "finished_at": time.time(), "profiler": profiler})
+
+
+def get_profiles():
+    """Return the kept profiles, newest first"""
+    with _profiles_lock:
+        return list(_profiles)[::-1]
+
+
+def clear_profiles():
+    with _profiles_lock:
+        _profiles.clear()
@@ -0,0 +1,34 @@
+import functools
+import os
+import re
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+def _read_asset(name):
+    with open(os.path.join(ASSETS_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def minify_css(css):
+    """Drop comments and insignificant whitespace from a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', css).strip()
+
+
+def minify_html(html):
+    """Join markup onto one line, which also keeps Markdown from reading indented HTML as code"""
+    return re.sub(r'\s*\n\s*', '', html).strip()
+
+
+# app.py is re-executed on every rerun, but this module is imported once per
+# server process, so the blobs are read and minified only on the first run
+@functools.lru_cache(maxsize=None)
+def get_static_markup():
+    """Return the app stylesheet and static sidebar markup as ready-to-send HTML strings"""
+    return {
+        "styles": f"<style>{minify_css(_read_asset('app.css'))}</style>",
+        "sidebar_header": minify_html(_read_asset("sidebar_header.html")),
+        "sidebar_footer": minify_html(_read_asset("sidebar_footer.html"))
+    }
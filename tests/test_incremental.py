@@ -0,0 +1,63 @@
+import random
+
+from core import summarization
+from core.summarization import _block_key, split_text_into_blocks
+
+WORDS = "energy cell river climate model theory data ocean force mass student lecture".split()
+
+
+def make_paragraphs(count=80, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"Paragraph {index}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 160))) + "."
+        for index in range(count)
+    ]
+
+
+def block_keys(paragraphs):
+    return [_block_key(block) for block in split_text_into_blocks("\n\n".join(paragraphs))]
+
+
+def test_blocks_cover_the_text_in_order():
+    paragraphs = make_paragraphs()
+    blocks = split_text_into_blocks("\n\n".join(paragraphs))
+    assert len(blocks) > 1
+    assert "\n\n".join(blocks) == "\n\n".join(paragraphs)
+
+
+def test_editing_one_paragraph_changes_one_block():
+    paragraphs = make_paragraphs()
+    before = block_keys(paragraphs)
+    for index in (0, 25, 50, 79):
+        edited = list(paragraphs)
+        edited[index] += " One more sentence about the ocean."
+        after = block_keys(edited)
+        assert len(set(after) - set(before)) == 1, index
+
+
+def test_whitespace_changes_keep_every_block():
+    paragraphs = make_paragraphs()
+    respaced = ["  " + paragraph.replace(" ", "  ") for paragraph in paragraphs]
+    assert block_keys(respaced) == block_keys(paragraphs)
+
+
+def test_only_changed_blocks_are_summarized_again(monkeypatch):
+    requested = []
+
+    def fake_responses(prompts):
+        requested.extend(prompts)
+        return [f"summary {len(requested) - len(prompts) + index}" for index in range(len(prompts))]
+
+    monkeypatch.setattr(summarization, "get_gemini_responses", fake_responses)
+    monkeypatch.setattr(summarization, "generate_response", lambda prompt, stream=False: "final")
+
+    paragraphs = make_paragraphs()
+    block_summaries = {}
+    summarization.summarize_incrementally("\n\n".join(paragraphs), "short", block_summaries)
+    first_run = len(requested)
+    assert first_run == len(block_summaries) > 1
+
+    paragraphs[40] += " An added sentence."
+    summarization.summarize_incrementally("\n\n".join(paragraphs), "short", block_summaries)
+    assert len(requested) - first_run == 1
+    assert len(block_summaries) == first_run
@@ -0,0 +1,47 @@
+import pytest
+
+from core import rate_limit
+from core.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the monotonic clock used by the rate limiter with a settable one"""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_full_bucket_does_not_wait(clock):
+    bucket = TokenBucket(60)
+    assert [bucket.reserve() for _ in range(60)] == [0.0] * 60
+
+
+def test_empty_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    # One token per second at 60 per minute
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_refill_over_time_is_capped_at_capacity(clock):
+    bucket = TokenBucket(60, capacity=10)
+    bucket.reserve(10)
+    clock[0] += 3600
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_request_larger_than_capacity_takes_the_whole_bucket(clock):
+    bucket = TokenBucket(60)
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_refund_returns_tokens(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+    assert bucket.reserve(30) == pytest.approx(30.0)
+    bucket.refund(30)
+    assert bucket.reserve() == pytest.approx(1.0)
@@ -0,0 +1,56 @@
+from core.structured import JSONArrayParser
+
+
+def feed_all(chunks):
+    parser = JSONArrayParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = JSONArrayParser()
+    assert parser.feed('[{"a": 1}, {"a"') == [{"a": 1}]
+    assert parser.feed(': 2}]') == [{"a": 2}]
+
+
+def test_braces_and_brackets_inside_strings_are_ignored():
+    text = '[{"front": "set {x} and [y]", "back": "}]"}, {"front": "b", "back": "c"}]'
+    assert feed_all([text]) == [
+        {"front": "set {x} and [y]", "back": "}]"},
+        {"front": "b", "back": "c"}
+    ]
+
+
+def test_escaped_quotes_and_backslashes():
+    text = r'[{"q": "say \"hi\" {", "a": "C:\\"}, {"q": "next"}]'
+    assert feed_all([text]) == [{"q": 'say "hi" {', "a": "C:\\"}, {"q": "next"}]
+
+
+def test_escape_split_across_chunks():
+    chunks = ['[{"q": "a \\', '"quoted\\', '" }"}', ']']
+    assert feed_all(chunks) == [{"q": 'a "quoted" }'}]
+
+
+def test_code_fence_around_the_array():
+    text = '```json\n[\n  {"front": "a", "back": "b"}\n]\n```'
+    assert feed_all(text) == [{"front": "a", "back": "b"}]
+
+
+def test_array_wrapped_in_an_object():
+    chunks = ['{"questions": [{"q": "a"}, ', '{"q": "b", "tags": ["x"]}', ']}']
+    assert feed_all(chunks) == [{"q": "a"}, {"q": "b", "tags": ["x"]}]
+
+
+def test_nested_objects_are_part_of_their_item():
+    assert feed_all(['[{"q": {"text": "x", "tags": ["a"]}}]']) == [{"q": {"text": "x", "tags": ["a"]}}]
+
+
+def test_truncated_output_keeps_complete_items_only():
+    assert feed_all(['[{"front": "a", "back": "b"}, {"front": "c", "ba']) == [{"front": "a", "back": "b"}]
+
+
+def test_malformed_item_is_returned_as_text():
+    items = feed_all(['[{"front": "a",}, {"front": "b"}]'])
+    assert items == ['{"front": "a",}', {"front": "b"}]
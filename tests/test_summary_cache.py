@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from core.summary_cache import SummaryCache, shingle_hashes
+
+WORDS = (
+    "energy cell river climate model theory data ocean force mass student lecture "
+    "history market policy protein orbit signal network language"
+).split()
+
+
+def make_article(seed, paragraphs=8, words=80):
+    rng = random.Random(seed)
+    return "\n\n".join(
+        " ".join(rng.choice(WORDS) for _ in range(words)) + "." for _ in range(paragraphs)
+    )
+
+
+@pytest.fixture
+def cache():
+    return SummaryCache(threshold=0.9, max_entries=100)
+
+
+def test_whitespace_and_case_do_not_change_the_shingles():
+    text = make_article(1)
+    assert shingle_hashes(text) == shingle_hashes("  " + text.upper().replace("\n\n", "\n \n\n"))
+
+
+def test_near_duplicate_reuses_the_summary(cache):
+    text = make_article(1)
+    cache.set(cache.signature(text), "short", "the summary")
+    edited = text.replace("\n\n", "\n\n\n") + "\n\nThanks for reading."
+    assert cache.get(cache.signature(edited), "short") == "the summary"
+
+
+def test_distinct_texts_do_not_match(cache):
+    for seed in range(20):
+        cache.set(cache.signature(make_article(seed)), "short", f"summary {seed}")
+    misses = [cache.get(cache.signature(make_article(seed)), "short") for seed in range(100, 150)]
+    assert misses == [None] * 50
+
+
+def test_near_duplicates_are_recalled(cache):
+    rng = random.Random(7)
+    recalled = 0
+    for seed in range(30):
+        text = make_article(seed)
+        cache.set(cache.signature(text), "medium", f"summary {seed}")
+        # Change one word of the article
+        words = text.split(" ")
+        words[rng.randrange(len(words))] = "changed"
+        recalled += cache.get(cache.signature(" ".join(words)), "medium") == f"summary {seed}"
+    assert recalled >= 29
+
+
+def test_length_setting_is_part_of_the_key(cache):
+    signature = cache.signature(make_article(3))
+    cache.set(signature, "short", "short summary")
+    assert cache.get(signature, "long") is None
+    assert cache.get(signature, "short") == "short summary"
+
+
+def test_short_text_is_not_fingerprinted(cache):
+    assert cache.signature("only a few words here") is None
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SummaryCache(threshold=0.9, max_entries=2)
+    signatures = [cache.signature(make_article(seed)) for seed in range(3)]
+    for index, signature in enumerate(signatures):
+        cache.set(signature, "short", f"summary {index}")
+    assert cache.get(signatures[0], "short") is None
+    assert cache.get(signatures[2], "short") == "summary 2"
+    assert cache.stats()["entries"] == 2
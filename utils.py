@@ -1,205 +1,154 @@
-import google.generativeai as genai
-import streamlit as st
-import PyPDF2
-from pytube import YouTube
-from youtube_transcript_api import YouTubeTranscriptApi
-import io
-import re
+"""Streamlit adapters over the UI-free pipeline in the core package.
 
-# Gemini model configuration
-def get_gemini_response(prompt, model_name="gemini-1.5-pro"):
-    """Get response from Gemini model"""
+Each function mirrors its core counterpart but shows failures with st.error
+(and non-fatal problems with st.warning) and returns None instead of raising.
+"""
+import streamlit as st
+from core import gemini, pdf_extraction, structured, summarization, tracing, youtube
+from core.errors import PipelineError
+from core.structured import format_flashcard, format_question
+from core.summarization import parse_flashcards, summarize_pdf_job
+from core.youtube import MAX_VIDEO_WORKERS, extract_video_id
+import itertools
+
+def _report_errors(func, *args, **kwargs):
+    """Call a core function in a trace, showing a PipelineError with st.error and returning None"""
     try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        st.error(f"Error with Gemini API: {str(e)}")
+        with tracing.trace(func.__name__):
+            return func(*args, **kwargs)
+    except PipelineError as e:
+        st.error(str(e))
         return None
 
-# Text summarization
-def summarize_text(text, length="medium"):
-    """Summarize text using Gemini API"""
-    if not text:
-        return "Please provide some text to summarize."
-
-    length_guide = {
-        "short": "Create a very concise summary in 2-3 sentences.",
-        "medium": "Create a comprehensive summary in about 5-7 sentences.",
-        "long": "Create a detailed summary covering all key points."
-    }
+def _report_stream_errors(func, *args, **kwargs):
+    """Pass the chunks of a core generator through in a trace, ending with st.error on failure"""
+    try:
+        yield from tracing.traced_stream(func.__name__, func, *args, **kwargs)
+    except PipelineError as e:
+        st.error(str(e))
+
+def _show_warnings(warnings):
+    for warning in warnings:
+        st.warning(warning)
+
+def _show_budget_notice(content):
+    """Tell the user when content is too long to send in full and will be sampled"""
+    plan = summarization.plan_request(content or "", task="quiz")
+    if plan["precompressed"]:
+        st.info(
+            f"The content is about {plan['original_tokens']:,} tokens; its most relevant "
+            f"sentences (about {plan['tokens']:,} tokens) will be used."
+        )
+    if plan["strategy"] == "truncate":
+        st.info(
+            f"The content is about {plan['tokens']:,} tokens; evenly spaced excerpts "
+            f"totalling about {plan['budget']:,} tokens will be used."
+        )
 
-    prompt = f"""
-    Please summarize the following text. {length_guide.get(length, length_guide["medium"])}
+# Gemini model configuration
+def get_gemini_response(prompt, model_name="gemini-1.5-pro", generation_config=None, use_cache=True):
+    """Get response from Gemini model, reusing cached answers for identical prompts"""
+    return _report_errors(gemini.get_gemini_response, prompt, model_name, generation_config, use_cache)
 
-    TEXT TO SUMMARIZE:
-    {text}
-    """
+def stream_gemini_response(prompt, model_name="gemini-1.5-pro", generation_config=None, use_cache=True):
+    """Yield the Gemini response text chunk by chunk as it is generated"""
+    return _report_stream_errors(gemini.stream_gemini_response, prompt, model_name, generation_config, use_cache)
 
-    return get_gemini_response(prompt)
+# Text summarization
+def summarize_text(text, length="medium", stream=False):
+    """Summarize text using Gemini API (stream=True returns a chunk generator)"""
+    if stream:
+        return _report_stream_errors(summarization.summarize_text, text, length, stream=True)
+    return _report_errors(summarization.summarize_text, text, length)
+
+def summarize_incrementally(text, length="medium", block_summaries=None, stream=False):
+    """Summarize text, re-summarizing only the blocks changed since block_summaries was filled"""
+    if stream:
+        return _report_stream_errors(summarization.summarize_incrementally, text, length, block_summaries, stream=True)
+    return _report_errors(summarization.summarize_incrementally, text, length, block_summaries)
+
+# Streaming display helpers
+def peek_stream(chunks):
+    """Wait for the first chunk of a stream; returns None if the stream is empty"""
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return None
+    return itertools.chain([first], chunks)
+
+def render_stream(chunks, placeholder, template=None):
+    """Render streamed chunks into a placeholder as they arrive and return the full text"""
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        # Model output is only rendered with HTML inside the summary box template
+        if template is None:
+            placeholder.markdown(text)
+        else:
+            placeholder.markdown(template.format(text), unsafe_allow_html=True)
+    return text
 
 # PDF processing
 def extract_text_from_pdf(pdf_file):
-    """Extract text from a PDF file"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
-        return text
-    except Exception as e:
-        st.error(f"Error extracting text from PDF: {str(e)}")
-        return None
+    """Extract text from a PDF file (cached by content hash across reruns and sessions)"""
+    return _report_errors(pdf_extraction.extract_text_from_pdf, pdf_file)
 
 # YouTube video processing
 def get_youtube_transcript(youtube_url):
     """Get transcript from YouTube video"""
-    # Simple validation of URL format
-    if not ('youtube.com' in youtube_url or 'youtu.be' in youtube_url):
-        st.error("Invalid YouTube URL. Please enter a valid YouTube URL.")
+    video_info = _report_errors(youtube.get_youtube_transcript, youtube_url)
+    if video_info is None:
         return None
 
-    # Set default values in case we can't get actual data
-    video_title = "YouTube Video"
-    video_author = "YouTube Creator"
-    video_length = 0
-    transcript_text = ""
+    _show_warnings(video_info["warnings"])
+    if video_info["simulated"]:
+        st.info("No transcript was available, so this is a simulated transcript based on the video title.")
+    return video_info
 
-    try:
-        # Extract video ID using our helper function
-        video_id = extract_video_id(youtube_url)
-        if not video_id:
-            st.error("Could not extract video ID from URL. Please check the URL format.")
-            return None
-
-        # Try to get video metadata using pytube
-        try:
-            yt = YouTube(youtube_url)
-            video_title = yt.title or video_title
-            video_author = yt.author or video_author
-            video_length = yt.length or video_length
-        except Exception as e:
-            st.warning(f"Could not get video metadata: {e}")
-            # Continue with default values
-
-        # Try to get transcript using YouTubeTranscriptApi
-        try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript_text = " ".join([item['text'] for item in transcript_list])
-        except Exception as e:
-            st.warning(f"Could not get transcript: {e}")
-            # We'll generate a simulated transcript below
-            transcript_text = ""
-
-        # If we couldn't get a transcript, generate a simulated one
-        if not transcript_text.strip():
-            st.info("Generating a simulated transcript based on the video title...")
-
-            # Generate a simulated transcript using Gemini
-            prompt = f"""
-            Create a simulated transcript for a YouTube video with the following details:
-            Title: {video_title}
-            Author: {video_author}
-            Length: {video_length} seconds
-
-            The transcript should be a plausible representation of what might be said in this video.
-            Focus on creating coherent, informative content related to the title.
-            """
-
-            transcript_text = get_gemini_response(prompt) or ""
-
-        # Create and return video info dictionary
-        return {
-            "title": video_title,
-            "author": video_author,
-            "length": video_length,
-            "transcript": transcript_text
-        }
-
-    except Exception as e:
-        st.error(f"Error processing YouTube video: {e}")
-        return None
+# Batch YouTube processing
+def expand_youtube_urls(urls):
+    """Resolve video and playlist URLs into a de-duplicated list of video URLs"""
+    video_urls, warnings = youtube.expand_youtube_urls(urls)
+    _show_warnings(warnings)
+    return video_urls
+
+def summarize_videos(video_urls, length="medium", max_workers=MAX_VIDEO_WORKERS):
+    """Fetch and summarize several videos concurrently, yielding each result as it completes"""
+    # Results carry their own error and warnings, since the worker threads
+    # cannot write to the page
+    return youtube.summarize_videos(video_urls, length, max_workers)
 
-# Helper function to extract YouTube video ID
-def extract_video_id(youtube_url):
-    """Extract the video ID from a YouTube URL"""
-    # Simple approach to extract video ID
-    if 'youtu.be/' in youtube_url:
-        # Handle shortened URLs
-        parts = youtube_url.split('youtu.be/')
-        if len(parts) > 1:
-            return parts[1].split('?')[0].split('&')[0]
-    elif 'youtube.com/watch' in youtube_url:
-        # Handle standard URLs
-        if 'v=' in youtube_url:
-            v_index = youtube_url.index('v=')
-            video_id = youtube_url[v_index+2:].split('&')[0].split('?')[0]
-            return video_id
-    elif 'youtube.com/embed/' in youtube_url:
-        # Handle embed URLs
-        parts = youtube_url.split('youtube.com/embed/')
-        if len(parts) > 1:
-            return parts[1].split('?')[0].split('&')[0]
-
-    # If we couldn't extract the ID, try a more comprehensive approach with regex
-    patterns = [
-        r'(?:youtube\.com/watch\?v=|youtu\.be/)([\w-]+)',  # Standard and shortened URLs
-        r'youtube\.com/embed/([\w-]+)',                     # Embed URLs
-        r'youtube\.com/v/([\w-]+)',                        # Old embed URLs
-        r'youtube\.com/\?v=([\w-]+)'                       # Another variation
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, youtube_url)
-        if match:
-            return match.group(1)
-
-    return None
+def summarize_course(video_results, length="medium"):
+    """Combine per-video summaries into one course-level summary"""
+    return _report_errors(youtube.summarize_course, video_results, length)
 
 # Quiz generation
-def generate_quiz(content, num_questions=5):
-    """Generate quiz questions from content"""
-    prompt = f"""
-    Based on the following content, create a quiz with {num_questions} questions.
-    For each question, provide:
-    1. The question
-    2. Four possible answers (A, B, C, D)
-    3. The correct answer
-    4. A brief explanation of why it's correct
-
-    Format each question as follows:
-
-    Q1: [Question text]
-    A: [Option A]
-    B: [Option B]
-    C: [Option C]
-    D: [Option D]
-    Correct Answer: [Letter]
-    Explanation: [Brief explanation]
-
-    CONTENT:
-    {content}
-    """
-
-    return get_gemini_response(prompt)
+def generate_quiz(content, num_questions=5, stream=False):
+    """Generate quiz questions from content (stream=True returns a chunk generator)"""
+    _show_budget_notice(content)
+    if stream:
+        return _report_stream_errors(summarization.generate_quiz, content, num_questions, stream=True)
+    return _report_errors(summarization.generate_quiz, content, num_questions)
+
+def stream_quiz_questions(content, num_questions=5):
+    """Yield validated quiz Question objects as they are generated (JSON mode)"""
+    _show_budget_notice(content)
+    return _report_stream_errors(structured.stream_quiz_questions, content, num_questions)
 
 # Flashcard generation
-def generate_flashcards(content, num_cards=5):
-    """Generate flashcards from content"""
-    prompt = f"""
-    Based on the following content, create {num_cards} flashcards for studying.
-    For each flashcard, provide:
-    1. A front side with a question or term
-    2. A back side with the answer or definition
-
-    Format each flashcard as follows:
-
-    CARD 1
-    Front: [Question or term]
-    Back: [Answer or definition]
-
-    CONTENT:
-    {content}
-    """
-
-    return get_gemini_response(prompt)
+def generate_flashcards(content, num_cards=5, stream=False):
+    """Generate flashcards from content (stream=True returns a chunk generator)"""
+    _show_budget_notice(content)
+    if stream:
+        return _report_stream_errors(summarization.generate_flashcards, content, num_cards, stream=True)
+    return _report_errors(summarization.generate_flashcards, content, num_cards)
+
+def stream_flashcards(content, num_cards=5):
+    """Yield validated Flashcard objects as they are generated (JSON mode)"""
+    _show_budget_notice(content)
+    return _report_stream_errors(structured.stream_flashcards, content, num_cards)
+
+# Study packs
+def generate_study_pack(content, length="medium", num_questions=5, num_cards=5):
+    """Generate a summary, quiz and flashcards from the same content in one pass"""
+    return _report_errors(summarization.generate_study_pack, content, length, num_questions, num_cards)